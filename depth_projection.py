@@ -0,0 +1,102 @@
+import functools
+import math
+from collections import namedtuple
+
+import numpy as np
+
+RayTable = namedtuple("RayTable", ["directions", "origin", "shape"])
+
+
+@functools.lru_cache(maxsize=32)
+def get_ray_table(height, width, hfov=90.0, sensor_position=(0.0, 0.0, 0.0)):
+    r"""Cached per-pixel ray table of a Habitat pinhole depth camera.
+
+    Habitat cameras look down -Z with +Y up, and the depth sensor returns
+    the distance along the optical axis, so a pixel's point in the agent
+    frame is ``origin + directions[pixel] * depth``. ``hfov`` is in degrees
+    and ``sensor_position`` is the sensor offset in the agent frame, as in
+    ``CameraSensorSpec.position``.
+    """
+    focal = (width / 2.0) / math.tan(math.radians(hfov) / 2.0)
+    u = (np.arange(width) + 0.5 - width / 2.0) / focal
+    v = -(np.arange(height) + 0.5 - height / 2.0) / focal
+    directions = np.empty((height, width, 3), dtype=np.float32)
+    directions[..., 0] = u[None, :]
+    directions[..., 1] = v[:, None]
+    directions[..., 2] = -1.0
+    directions.flags.writeable = False
+    origin = np.asarray(sensor_position, dtype=np.float32)
+    origin.flags.writeable = False
+    return RayTable(directions.reshape(-1, 3), origin, (height, width))
+
+
+def ray_table_from_spec(sensor_spec):
+    height, width = (int(value) for value in sensor_spec.resolution)
+    return get_ray_table(height, width, float(sensor_spec.hfov), tuple(float(value) for value in sensor_spec.position))
+
+
+def quaternion_to_matrix(quaternions):
+    r"""Rotation matrices ``(B, 3, 3)`` from ``(B, 4)`` wxyz quaternions."""
+    q = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = q.T
+    return np.stack(
+        [
+            np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=1),
+            np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=1),
+            np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=1),
+        ],
+        axis=1,
+    )
+
+
+def poses_from_agent_states(agent_states):
+    r"""``(B, 3)`` positions and ``(B, 4)`` wxyz rotations of ``AgentState`` objects."""
+    positions = np.array([state.position for state in agent_states], dtype=np.float64)
+    rotations = np.array(
+        [[state.rotation.w, state.rotation.x, state.rotation.y, state.rotation.z] for state in agent_states],
+        dtype=np.float64,
+    )
+    return positions, rotations
+
+
+def voxel_downsample(points, voxel_size, labels=None):
+    r"""Average the points falling in each voxel; each voxel keeps the label of its first point."""
+    keys = np.floor(points / voxel_size).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse)
+    centroids = np.stack([np.bincount(inverse, points[:, axis]) / counts for axis in range(3)], axis=1)
+    return centroids.astype(points.dtype), None if labels is None else labels[first]
+
+
+def backproject_depth(depth, positions, rotations, ray_table, max_depth=None, semantic=None, voxel_size=None):
+    r"""World-frame point cloud from a batch of depth frames.
+
+    ``depth`` is ``(B, H, W)`` (or a single ``(H, W)`` frame), ``positions``
+    and ``rotations`` are the agent poses as ``(B, 3)`` and ``(B, 4)`` wxyz
+    arrays. All frames are projected in one vectorized pass; pixels with
+    zero depth, or beyond ``max_depth``, are dropped. ``semantic`` frames of
+    the same shape are carried over as per-point labels, and ``voxel_size``
+    enables voxel-grid downsampling.
+
+    Returns ``(points, labels)``, with ``labels`` ``None`` without semantics.
+    """
+    depth = np.asarray(depth, dtype=np.float32)
+    depth = depth.reshape(-1, ray_table.shape[0] * ray_table.shape[1])
+    valid = depth > 0
+    if max_depth is not None:
+        valid &= depth <= max_depth
+
+    points = ray_table.directions[None] * depth[..., None] + ray_table.origin
+    matrices = quaternion_to_matrix(rotations).astype(np.float32)
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    points = np.einsum("bij,bnj->bni", matrices, points) + positions[:, None, :]
+    points = points[valid]
+
+    labels = None
+    if semantic is not None:
+        labels = np.asarray(semantic).reshape(depth.shape)[valid]
+    if voxel_size is not None and len(points):
+        points, labels = voxel_downsample(points, voxel_size, labels)
+    return points, labels
@@ -1,3 +1,5 @@
+import atexit
+import contextlib
 import os
 import random
 
@@ -5,6 +7,9 @@ import habitat_sim
 import numpy as np
 
 from utils import *
+from frame_compositor import FrameCompositor, ImageFileSink
+from live_viewer import LiveViewer
+from sensor_rig import build_sensor_specs
 
 data_path = get_data_path()
 scene_path = os.path.join(
@@ -35,32 +40,8 @@ def make_cfg(settings):
     sim_cfg.scene_dataset_config_file = settings["scene_dataset"]
     sim_cfg.enable_physics = settings["enable_physics"]
 
-    # Note: all sensors must have the same resolution
-    sensor_specs = []
-
-    color_sensor_spec = habitat_sim.CameraSensorSpec()
-    color_sensor_spec.uuid = "color_sensor"
-    color_sensor_spec.sensor_type = habitat_sim.SensorType.COLOR
-    color_sensor_spec.resolution = [settings["height"], settings["width"]]
-    color_sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
-    color_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(color_sensor_spec)
-
-    depth_sensor_spec = habitat_sim.CameraSensorSpec()
-    depth_sensor_spec.uuid = "depth_sensor"
-    depth_sensor_spec.sensor_type = habitat_sim.SensorType.DEPTH
-    depth_sensor_spec.resolution = [settings["height"], settings["width"]]
-    depth_sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
-    depth_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(depth_sensor_spec)
-
-    semantic_sensor_spec = habitat_sim.CameraSensorSpec()
-    semantic_sensor_spec.uuid = "semantic_sensor"
-    semantic_sensor_spec.sensor_type = habitat_sim.SensorType.SEMANTIC
-    semantic_sensor_spec.resolution = [settings["height"], settings["width"]]
-    semantic_sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
-    semantic_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(semantic_sensor_spec)
+    # Only the enabled sensors are created, each one is a render pass per step
+    sensor_specs = build_sensor_specs(settings)
 
     # Here you can specify the amount of displacement in a forward action and the turn angle
     agent_cfg = habitat_sim.agent.AgentConfiguration()
@@ -81,26 +62,94 @@ def make_cfg(settings):
 
 
 sim_cfg = make_cfg(sim_settings)
-sim = habitat_sim.Simulator(sim_cfg)
+action_names = list(sim_cfg.agents[sim_settings["default_agent"]].action_space.keys())
 
-random.seed(sim_settings["seed"])
-sim.seed(sim_settings["seed"])
+# The simulator is only built on first use and then shared within the process,
+# so importing this module for its configs or helpers does not load a scene.
+_sim = None
+_sim_settings = None
+_sim_users = 0
+# set once get_sim() hands the instance out, such holders keep it until exit
+_sim_pinned = False
+
+
+def _acquire_sim(settings):
+    global _sim, _sim_settings
+    if _sim is not None:
+        if settings != _sim_settings:
+            # other tools hold the shared instance, reconfiguring it would change their scene under them
+            raise RuntimeError("The shared simulator is running with different settings, call close_sim() first")
+        return _sim
+    _sim = habitat_sim.Simulator(make_cfg(settings))
+    _sim_settings = dict(settings)
+
+    random.seed(settings["seed"])
+    _sim.seed(settings["seed"])
+
+    agent = _sim.initialize_agent(settings["default_agent"])
+    agent_state = habitat_sim.AgentState()
+    agent_state.position = np.array([-0.6, 0.0, 0.0])
+    agent.set_state(agent_state)
+    return _sim
+
+
+def get_sim(settings=sim_settings):
+    global _sim_pinned
+    sim = _acquire_sim(settings)
+    _sim_pinned = True
+    return sim
+
+
+def close_sim():
+    global _sim, _sim_settings, _sim_users, _sim_pinned
+    if _sim is not None:
+        _sim.close()
+    _sim = None
+    _sim_settings = None
+    _sim_users = 0
+    _sim_pinned = False
+
+
+# registered once; a no-op when no simulator is open at exit
+atexit.register(close_sim)
+
+
+@contextlib.contextmanager
+def simulator(settings=sim_settings):
+    # nested users share one instance, which is closed when the outermost one
+    # exits unless get_sim() has handed it out as well
+    global _sim_users
+    sim = _acquire_sim(settings)
+    _sim_users += 1
+    try:
+        yield sim
+    finally:
+        _sim_users -= 1
+        if _sim_users == 0 and not _sim_pinned:
+            close_sim()
 
-agent = sim.initialize_agent(sim_settings["default_agent"])
-agent_state = habitat_sim.AgentState()
-agent_state.position = np.array([-0.6, 0.0, 0.0])
-agent.set_state(agent_state)
-action_names = list(sim_cfg.agents[sim_settings["default_agent"]].action_space.keys())
 
 def main():
-    for _ in range(5):
-        action = random.choice(action_names)
-        print("action", action)
-        observations = sim.step(action)
-        rgb = observations["color_sensor"]
-        semantic = observations["semantic_sensor"]
-        depth = observations["depth_sensor"]
-        display_sample(rgb, semantic, depth)
+    # without a display, composites are written to output/frames instead of shown
+    interactive = bool(os.environ.get("DISPLAY"))
+    if interactive:
+        viewer = LiveViewer.from_settings(sim_settings)
+        show = viewer.update_observations
+    else:
+        sink = ImageFileSink(os.path.join(get_output_path(), "frames"))
+        viewer = FrameCompositor.from_settings(sim_settings, sink=sink)
+        show = viewer.compose_observations
+    with simulator() as sim:
+        for _ in range(5):
+            action = random.choice(action_names)
+            print("action", action)
+            observations = sim.step(action)
+            if "color_sensor" in observations:
+                show(observations)
+    if interactive:
+        # keep the window open until it is closed by the user
+        viewer.hold()
+    viewer.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+
+import imageio
+import numpy as np
+from habitat_sim.utils.common import d3_40_colors_rgb
+
+PANEL_SENSORS = {"rgb": "color_sensor", "semantic": "semantic_sensor", "depth": "depth_sensor"}
+
+
+def _gray_lut():
+    lut = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+    lut.flags.writeable = False
+    return lut
+
+
+class FrameCompositor:
+    r"""Headless side-by-side composites of RGB, semantic and depth frames.
+
+    The same panels as ``utils.display_sample``, without matplotlib or PIL:
+    every panel is written into one preallocated ``(H, W * num_panels, 3)``
+    uint8 canvas through NumPy lookup tables. Semantic ids are mapped with
+    the ``d3_40_colors_rgb`` palette (``id % 40``) and depth is scaled by
+    ``max_depth`` into a 256 entry colormap, grayscale by default. All
+    intermediate buffers are allocated once, so :meth:`compose` does not
+    allocate per frame. Frames at a different resolution than the panels
+    are resized into them by nearest neighbour.
+
+    The returned canvas is reused by the next call; copy it to keep it.
+    When a ``sink`` (any object with ``write(frame)`` and ``close()``) is
+    given, every composite is also handed to it.
+    """
+
+    def __init__(
+        self,
+        height,
+        width,
+        panels=("rgb", "semantic", "depth"),
+        max_depth=10.0,
+        palette=d3_40_colors_rgb,
+        depth_colormap=None,
+        sink=None,
+    ):
+        unknown = set(panels) - set(PANEL_SENSORS)
+        if unknown:
+            raise ValueError(f"Unknown panels: {sorted(unknown)}")
+        self.height = height
+        self.width = width
+        self.panels = tuple(panels)
+        self.max_depth = max_depth
+        self.palette = np.ascontiguousarray(palette, dtype=np.uint8)
+        self.depth_colormap = _gray_lut() if depth_colormap is None else np.asarray(depth_colormap, dtype=np.uint8)
+        self.sink = sink
+
+        self.canvas = np.zeros((height, width * len(self.panels), 3), dtype=np.uint8)
+        self._views = {
+            name: self.canvas[:, i * width : (i + 1) * width] for i, name in enumerate(self.panels)
+        }
+        # scratch buffers for the lookups
+        self._index = np.empty((height, width), dtype=np.intp)
+        self._scaled = np.empty((height, width), dtype=np.float32)
+        self._colors = np.empty((height, width, 3), dtype=np.uint8)
+        # frame shape -> nearest-neighbour (rows, cols) into the panel
+        self._resize_index = {}
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        r"""Compositor with a panel for every sensor enabled in ``settings``.
+
+        Panels use the default ``height``/``width``; sensors with a
+        ``<uuid>_resolution`` override are resized into their panel.
+        """
+        panels = [name for name, uuid in PANEL_SENSORS.items() if settings.get(uuid, name == "rgb")]
+        return cls(settings["height"], settings["width"], panels, **kwargs)
+
+    def _fit(self, frame):
+        # nearest-neighbour resize of frames whose resolution differs from the panel
+        frame = np.asarray(frame)
+        shape = frame.shape[:2]
+        if shape == (self.height, self.width):
+            return frame
+        index = self._resize_index.get(shape)
+        if index is None:
+            rows = np.arange(self.height) * shape[0] // self.height
+            cols = np.arange(self.width) * shape[1] // self.width
+            index = self._resize_index[shape] = (rows[:, None], cols[None, :])
+        return frame[index]
+
+    def compose(self, rgb=None, semantic=None, depth=None):
+        r"""Write the given frames into their panels and return the canvas.
+
+        Panels whose frame is missing or empty are cleared.
+        """
+        frames = {"rgb": rgb, "semantic": semantic, "depth": depth}
+        for name in self.panels:
+            frame = frames[name]
+            view = self._views[name]
+            if frame is None or np.size(frame) == 0:
+                view.fill(0)
+                continue
+            frame = self._fit(frame)
+            if name == "rgb":
+                np.copyto(view, frame[..., :3])
+            elif name == "semantic":
+                np.remainder(frame, len(self.palette), out=self._index, casting="unsafe")
+                np.take(self.palette, self._index, axis=0, out=self._colors)
+                np.copyto(view, self._colors)
+            else:
+                if frame.ndim == 3:
+                    frame = frame[..., 0]
+                np.multiply(frame, (len(self.depth_colormap) - 1) / self.max_depth, out=self._scaled)
+                np.clip(self._scaled, 0, len(self.depth_colormap) - 1, out=self._scaled)
+                np.copyto(self._index, self._scaled, casting="unsafe")
+                np.take(self.depth_colormap, self._index, axis=0, out=self._colors)
+                np.copyto(view, self._colors)
+        if self.sink is not None:
+            self.sink.write(self.canvas)
+        return self.canvas
+
+    def compose_observations(self, observations):
+        r"""Composite of a ``sim.step`` observation dict."""
+        return self.compose(*(observations.get(PANEL_SENSORS[name]) for name in ("rgb", "semantic", "depth")))
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+
+class ImageFileSink:
+    r"""Writes every frame to ``<directory>/<prefix>_<index>.<extension>``."""
+
+    def __init__(self, directory, prefix="frame", extension="png"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.extension = extension
+        self.count = 0
+
+    def write(self, frame):
+        path = os.path.join(self.directory, f"{self.prefix}_{self.count:06d}.{self.extension}")
+        imageio.imwrite(path, frame)
+        self.count += 1
+
+    def close(self):
+        pass
@@ -0,0 +1,124 @@
+import numpy as np
+from scipy import ndimage
+
+from geodesic_field import grid_distance
+
+_FOUR_CONNECTED = ndimage.generate_binary_structure(2, 1)
+_EIGHT_CONNECTED = ndimage.generate_binary_structure(2, 2)
+
+
+class FrontierTracker:
+    r"""Incrementally maintained frontier cells and frontier clusters.
+
+    A frontier cell is an explored free cell with an unexplored 4-neighbour,
+    read from an occupancy log-odds grid (``< 0`` free, ``0`` unexplored),
+    such as :attr:`occupancy_mapper.OccupancyMapper.log_odds`.
+
+    :meth:`update` takes the rectangle changed by the latest observation
+    (the return value of ``OccupancyMapper.update``); frontier status is
+    only recomputed inside that rectangle grown by one cell, and only the
+    8-connected clusters touching it are relabelled, so the cost follows the
+    observation rather than the map size.
+    """
+
+    def __init__(self, shape, meters_per_pixel, min_cluster_size=1):
+        self.shape = tuple(shape)
+        self.meters_per_pixel = meters_per_pixel
+        self.min_cluster_size = min_cluster_size
+        self.frontier = np.zeros(self.shape, dtype=bool)
+        self.labels = np.zeros(self.shape, dtype=np.int32)
+        # cluster id -> (size, centroid (row, col), bounding rectangle (r0, r1, c0, c1))
+        self.clusters = {}
+        self._next_id = 1
+
+    @classmethod
+    def from_mapper(cls, mapper, min_cluster_size=1):
+        return cls(mapper.log_odds.shape, mapper.transform.meters_per_pixel, min_cluster_size)
+
+    def _grow(self, rect, margin):
+        r0, r1, c0, c1 = rect
+        return (max(0, r0 - margin), min(self.shape[0], r1 + margin), max(0, c0 - margin), min(self.shape[1], c1 + margin))
+
+    def update(self, log_odds, rect):
+        if rect is None:
+            return
+        # frontier status depends on a cell and its 4-neighbours
+        r0, r1, c0, c1 = self._grow(rect, 1)
+        p0, p1, q0, q1 = self._grow((r0, r1, c0, c1), 1)
+        window = log_odds[p0:p1, q0:q1]
+        frontier = (window < 0) & ndimage.binary_dilation(window == 0, _FOUR_CONNECTED)
+        self.frontier[r0:r1, c0:c1] = frontier[r0 - p0 : r1 - p0, c0 - q0 : c1 - q0]
+        self._recluster((r0, r1, c0, c1))
+
+    def _recluster(self, region):
+        # grow the region until it fully contains every cluster it touches
+        stale = set()
+        while True:
+            r0, r1, c0, c1 = self._grow(region, 1)
+            ids = set(np.unique(self.labels[r0:r1, c0:c1]).tolist()) - {0} - stale
+            if not ids:
+                break
+            stale |= ids
+            for cluster_id in ids:
+                b0, b1, d0, d1 = self.clusters[cluster_id][2]
+                region = (min(region[0], b0), max(region[1], b1), min(region[2], d0), max(region[3], d1))
+
+        r0, r1, c0, c1 = region
+        labels_view = self.labels[r0:r1, c0:c1]
+        frontier_view = self.frontier[r0:r1, c0:c1]
+        for cluster_id in stale:
+            del self.clusters[cluster_id]
+        labels_view[np.isin(labels_view, list(stale))] = 0
+
+        components, num_components = ndimage.label(frontier_view, _EIGHT_CONNECTED)
+        if not num_components:
+            return
+        index = np.arange(1, num_components + 1)
+        sizes = np.bincount(components.reshape(-1), minlength=num_components + 1)[1:]
+        centroids = ndimage.center_of_mass(frontier_view, components, index)
+        for label, size, centroid, slices in zip(index, sizes, centroids, ndimage.find_objects(components)):
+            cluster_id = self._next_id
+            self._next_id += 1
+            labels_view[slices][components[slices] == label] = cluster_id
+            rect = (r0 + slices[0].start, r0 + slices[0].stop, c0 + slices[1].start, c0 + slices[1].stop)
+            self.clusters[cluster_id] = (int(size), (r0 + centroid[0], c0 + centroid[1]), rect)
+
+    def cells(self):
+        r"""``(K, 2)`` (row, col) frontier cells."""
+        return np.argwhere(self.frontier)
+
+    def centroids(self):
+        r"""``(C, 2)`` (row, col) centroids and ``(C,)`` sizes of the clusters
+        with at least ``min_cluster_size`` cells."""
+        clusters = [cluster for cluster in self.clusters.values() if cluster[0] >= self.min_cluster_size]
+        if not clusters:
+            return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+        sizes, centroids, _ = zip(*clusters)
+        return np.asarray(centroids), np.asarray(sizes)
+
+    def nearest_frontier(self, log_odds, agent_cell, initial_radius=32):
+        r"""Geodesic distance in metres and cell of the closest frontier.
+
+        The search runs over explored free cells inside a window around the
+        agent that doubles until the closest frontier found is provably
+        nearer than the window edge, so its cost follows the frontier
+        distance rather than the map size. Returns ``(inf, None)`` when no
+        frontier is reachable.
+        """
+        row, col = (int(value) for value in agent_cell)
+        radius = initial_radius
+        while True:
+            r0, r1, c0, c1 = self._grow((row, row + 1, col, col + 1), radius)
+            traversable = log_odds[r0:r1, c0:c1] < 0
+            traversable[row - r0, col - c0] = True
+            covers_map = (r0, r1, c0, c1) == (0, self.shape[0], 0, self.shape[1])
+            limit = np.inf if covers_map else radius * self.meters_per_pixel
+            distances = grid_distance(traversable, [(row - r0, col - c0)], self.meters_per_pixel, limit)
+            distances = np.where(self.frontier[r0:r1, c0:c1], distances, np.inf)
+            best = np.unravel_index(np.argmin(distances), distances.shape)
+            best_distance = float(distances[best])
+            if best_distance <= limit:
+                if not np.isfinite(best_distance):
+                    return np.inf, None
+                return best_distance, (r0 + best[0], c0 + best[1])
+            radius *= 2
@@ -0,0 +1,165 @@
+import hashlib
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from topdown_transform import TopDownTransform
+from utils import cached_navmesh_hash, get_output_path, save_array_atomic
+
+# 8-connected neighbourhood as (row, col) offsets
+NEIGHBOR_OFFSETS = np.array([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+
+
+def grid_distance(navigable, sources, cell_size=1.0, limit=np.inf):
+    r"""Multi-source Dijkstra over the 8-connected navigable cells of a grid.
+
+    ``sources`` is a ``(K, 2)`` array of (row, col) cells. Returns a float32
+    raster of path lengths in the units of ``cell_size``, ``inf`` where no
+    source is reachable within ``limit``. Diagonal moves are only allowed
+    when both adjacent orthogonal cells are navigable, so paths never cut
+    obstacle corners.
+    """
+    navigable = np.asarray(navigable, dtype=bool)
+    rows, cols = navigable.shape
+    node_ids = np.full(navigable.shape, -1, dtype=np.int64)
+    node_ids[navigable] = np.arange(np.count_nonzero(navigable))
+
+    heads, tails, weights = [], [], []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        # cells (r, c) whose neighbour (r + dr, c + dc) is inside the grid
+        src = navigable[: rows - dr, max(0, -dc) : cols - max(0, dc)]
+        dst = navigable[dr:, max(0, dc) : cols + min(0, dc)]
+        valid = src & dst
+        if dr and dc:
+            valid &= navigable[: rows - dr, max(0, dc) : cols + min(0, dc)]
+            valid &= navigable[dr:, max(0, -dc) : cols - max(0, dc)]
+        r, c = np.nonzero(valid)
+        c = c + max(0, -dc)
+        heads.append(node_ids[r, c])
+        tails.append(node_ids[r + dr, c + dc])
+        weights.append(np.full(len(r), math.hypot(dr, dc) * cell_size))
+
+    num_nodes = np.count_nonzero(navigable)
+    graph = coo_matrix(
+        (np.concatenate(weights), (np.concatenate(heads), np.concatenate(tails))),
+        shape=(num_nodes, num_nodes),
+    ).tocsr()
+
+    sources = np.asarray(sources, dtype=np.int64).reshape(-1, 2)
+    source_ids = node_ids[sources[:, 0], sources[:, 1]]
+    source_ids = source_ids[source_ids >= 0]
+    distances = np.full(navigable.shape, np.inf, dtype=np.float32)
+    if len(source_ids):
+        distances[navigable] = dijkstra(graph, directed=False, indices=source_ids, min_only=True, limit=limit)
+    return distances
+
+
+class GeodesicDistanceField:
+    r"""Geodesic distance-to-goal raster for one goal on one floor.
+
+    Computed once per episode reset with :func:`grid_distance` over the
+    navigable top-down view at the goal height. Per-step distance-to-goal
+    and greedy next-direction queries are then plain array lookups instead
+    of a ``find_path`` per step.
+
+    Use :meth:`from_goal` to reuse fields across episodes that share the
+    same scene and goal; fields are cached in memory and under
+    ``output/geodesic_fields``.
+    """
+
+    _memory = OrderedDict()
+    max_memory_entries = 16
+
+    def __init__(self, pathfinder, goal, meters_per_pixel=0.05, distances=None):
+        self.goal = np.asarray(goal, dtype=np.float64).reshape(3)
+        self.meters_per_pixel = meters_per_pixel
+        if distances is None:
+            navigable = np.asarray(pathfinder.get_topdown_view(meters_per_pixel, self.goal[1]), dtype=bool)
+            self.transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel, grid_shape=navigable.shape)
+            distances = grid_distance(navigable, self._goal_cell(navigable), meters_per_pixel)
+        else:
+            # cached rasters already have the top-down view's shape
+            self.transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel, grid_shape=distances.shape)
+        self.distances = distances
+        self.directions = self._greedy_directions(distances)
+
+    @classmethod
+    def from_goal(cls, pathfinder, goal, meters_per_pixel=0.05, scene_key=None, cache_dir=None):
+        if scene_key is None:
+            scene_key = cached_navmesh_hash(pathfinder)
+        goal = np.asarray(goal, dtype=np.float64).reshape(3)
+        goal_key = "_".join(f"{value:.2f}" for value in goal)
+        key = hashlib.sha1(f"{scene_key}_{goal_key}_{meters_per_pixel:g}".encode()).hexdigest()[:24]
+
+        field = cls._memory.get(key)
+        if field is not None:
+            cls._memory.move_to_end(key)
+            return field
+
+        if cache_dir is None:
+            cache_dir = os.path.join(get_output_path(), "geodesic_fields")
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, key + ".npy")
+        distances = np.load(cache_path) if os.path.exists(cache_path) else None
+        field = cls(pathfinder, goal, meters_per_pixel, distances)
+        if distances is None:
+            save_array_atomic(cache_path, field.distances)
+
+        cls._memory[key] = field
+        while len(cls._memory) > cls.max_memory_entries:
+            cls._memory.popitem(last=False)
+        return field
+
+    def _goal_cell(self, navigable):
+        cell = np.rint(self.transform.world_to_grid(self.goal)[0, ::-1]).astype(np.int64)
+        cell = np.clip(cell, 0, np.array(navigable.shape) - 1)
+        if not navigable[cell[0], cell[1]]:
+            # goals slightly off the navmesh start from the closest navigable cell
+            _, (rows, cols) = ndimage.distance_transform_edt(~navigable, return_indices=True)
+            cell = np.array([rows[cell[0], cell[1]], cols[cell[0], cell[1]]])
+        return cell[None, :]
+
+    @staticmethod
+    def _greedy_directions(distances):
+        # index into NEIGHBOR_OFFSETS of the neighbour closest to the goal, -1 at the goal or off the field
+        rows, cols = distances.shape
+        padded = np.pad(distances, 1, constant_values=np.inf)
+        neighbors = np.stack(
+            [padded[1 + dr : 1 + dr + rows, 1 + dc : 1 + dc + cols] for dr, dc in NEIGHBOR_OFFSETS]
+        )
+        best = neighbors.argmin(axis=0)
+        improves = np.take_along_axis(neighbors, best[None], axis=0)[0] < distances
+        return np.where(improves, best, -1).astype(np.int8)
+
+    def _cells(self, points):
+        grid = np.rint(self.transform.world_to_grid(points)).astype(np.int64)
+        inside = self.transform.in_bounds(grid)
+        rows = np.clip(grid[:, 1], 0, self.distances.shape[0] - 1)
+        cols = np.clip(grid[:, 0], 0, self.distances.shape[1] - 1)
+        return rows, cols, inside
+
+    def distance(self, points):
+        r"""Geodesic distance to the goal for ``(N, 3)`` points, ``inf`` if unreachable."""
+        rows, cols, inside = self._cells(points)
+        return np.where(inside, self.distances[rows, cols], np.inf)
+
+    def next_direction(self, points):
+        r"""Unit world-frame ``(N, 3)`` step directions towards the goal.
+
+        Rows are zero at the goal cell and where the goal is unreachable.
+        """
+        rows, cols, inside = self._cells(points)
+        best = np.where(inside, self.directions[rows, cols], -1)
+        offsets = NEIGHBOR_OFFSETS[np.maximum(best, 0)].astype(np.float64)
+        offsets[best < 0] = 0.0
+        norm = np.linalg.norm(offsets, axis=1)
+        directions = np.zeros((len(best), 3))
+        # grid rows follow world z and grid columns follow world x
+        directions[:, 0] = np.divide(offsets[:, 1], norm, out=np.zeros_like(norm), where=norm > 0)
+        directions[:, 2] = np.divide(offsets[:, 0], norm, out=np.zeros_like(norm), where=norm > 0)
+        return directions
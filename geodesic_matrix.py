@@ -0,0 +1,97 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import habitat_sim
+import numpy as np
+
+from utils import get_output_path, hash_file, save_array_atomic
+
+_worker_pathfinder = None
+_worker_points = None
+
+
+def load_pathfinder(navmesh_path):
+    pathfinder = habitat_sim.PathFinder()
+    pathfinder.load_nav_mesh(navmesh_path)
+    if not pathfinder.is_loaded:
+        raise RuntimeError(f"Could not load navmesh {navmesh_path}")
+    return pathfinder
+
+
+def _init_worker(navmesh_path, points):
+    global _worker_pathfinder, _worker_points
+    _worker_pathfinder = load_pathfinder(navmesh_path)
+    _worker_points = points
+
+
+def _pair_distances(pairs):
+    path = habitat_sim.ShortestPath()
+    distances = np.empty(len(pairs), dtype=np.float32)
+    for k, (i, j) in enumerate(pairs):
+        path.requested_start = _worker_points[i]
+        path.requested_end = _worker_points[j]
+        found = _worker_pathfinder.find_path(path)
+        distances[k] = path.geodesic_distance if found else np.inf
+    return distances
+
+
+def geodesic_distance_matrix(points, navmesh_path, num_workers=None, cache_dir=None, shard_size=2048):
+    r"""All-pairs geodesic distances between ``(N, 3)`` navmesh points.
+
+    Returns an ``(N, N)`` float32 matrix with ``inf`` for unreachable pairs.
+    Only the upper triangle is queried, and pairs on different navmesh
+    islands are skipped without a path search. The remaining pairs are
+    sharded across a process pool in which every worker loads its own
+    pathfinder from ``navmesh_path``. Results are cached on disk by navmesh
+    hash and point-set hash.
+
+    The pool uses the ``spawn`` start method, which re-imports the calling
+    script in every worker: scripts that call this must guard their entry
+    point with ``if __name__ == "__main__":``.
+    """
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+    num_points = len(points)
+    if cache_dir is None:
+        cache_dir = os.path.join(get_output_path(), "geodesic_matrices")
+    os.makedirs(cache_dir, exist_ok=True)
+    points_key = hashlib.sha1(points.tobytes()).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{hash_file(navmesh_path)[:16]}_{points_key[:16]}.npy")
+    if os.path.exists(cache_path):
+        return np.load(cache_path)
+
+    matrix = np.full((num_points, num_points), np.inf, dtype=np.float32)
+    np.fill_diagonal(matrix, 0.0)
+    rows, cols = np.triu_indices(num_points, k=1)
+
+    pathfinder = load_pathfinder(navmesh_path)
+    if hasattr(pathfinder, "get_island"):
+        islands = np.array([pathfinder.get_island(point) for point in points])
+        same_island = (islands[rows] == islands[cols]) & (islands[rows] >= 0)
+        rows, cols = rows[same_island], cols[same_island]
+    pairs = np.stack([rows, cols], axis=1)
+    shards = [pairs[start : start + shard_size] for start in range(0, len(pairs), shard_size)]
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers <= 1 or len(shards) <= 1:
+        _init_worker(navmesh_path, points)
+        results = [_pair_distances(shard) for shard in shards]
+    else:
+        # spawn, so workers never inherit a GL context from the parent process
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(navmesh_path, points),
+        ) as executor:
+            results = list(executor.map(_pair_distances, shards))
+
+    if results:
+        distances = np.concatenate(results)
+        matrix[rows, cols] = distances
+        matrix[cols, rows] = distances
+
+    save_array_atomic(cache_path, matrix)
+    return matrix
@@ -0,0 +1,132 @@
+import numpy as np
+from scipy import ndimage
+
+from topdown_transform import TopDownTransform
+from utils import get_floor_heights
+
+
+class IslandIndex:
+    r"""Labelled top-down raster of the navmesh islands.
+
+    Built once per navmesh: every floor's navigable top-down view is split
+    into connected components, and each component is assigned the id of the
+    navmesh island it lies on (``pathfinder.get_island``), so components on
+    different floors that are joined by stairs share one id. Per-island area
+    and centroid are stored alongside the raster.
+
+    Reachability checks and island-restricted sampling are then array
+    lookups, which lets callers reject unreachable start/goal pairs before
+    running a ``ShortestPath`` query.
+    """
+
+    def __init__(self, pathfinder, meters_per_pixel=0.1, heights=None):
+        self.pathfinder = pathfinder
+        self.meters_per_pixel = meters_per_pixel
+        if heights is None:
+            heights = get_floor_heights(pathfinder)
+        self.heights = np.asarray(heights, dtype=np.float64)
+
+        get_island = getattr(pathfinder, "get_island", None)
+        # without get_island the ids are per-floor components, not navmesh island indices
+        self.navmesh_islands = get_island is not None
+        labels = []
+        next_label = 0
+        for height in self.heights:
+            navigable = np.asarray(pathfinder.get_topdown_view(meters_per_pixel, height), dtype=bool)
+            components, num_components = ndimage.label(navigable)
+            lut = np.full(num_components + 1, -1, dtype=np.int32)
+            if num_components:
+                index = np.arange(1, num_components + 1)
+                if get_island is None:
+                    lut[1:] = next_label + index - 1
+                    next_label += num_components
+                else:
+                    # query each component at its most interior cell to stay clear of island borders
+                    clearance = ndimage.distance_transform_edt(navigable)
+                    cells = np.asarray(ndimage.maximum_position(clearance, components, index), dtype=np.float64)
+                    transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel, grid_shape=navigable.shape)
+                    for label, point in zip(index, transform.grid_to_world(cells[:, ::-1], height)):
+                        lut[label] = get_island(pathfinder.snap_point(point))
+            labels.append(lut[components])
+        self.labels = np.stack(labels)
+        self.transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel, grid_shape=self.labels.shape[1:])
+
+        # per-island statistics from the raster cells
+        floors, rows, cols = np.nonzero(self.labels >= 0)
+        cell_labels = self.labels[floors, rows, cols]
+        self.num_islands = int(cell_labels.max()) + 1 if len(cell_labels) else 0
+        counts = np.bincount(cell_labels, minlength=self.num_islands)
+        self.areas = counts * meters_per_pixel ** 2
+        world = self.transform.grid_to_world(np.stack([cols, rows], axis=1), self.heights[floors])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.centroids = np.stack(
+                [np.bincount(cell_labels, world[:, axis], minlength=self.num_islands) / counts for axis in range(3)],
+                axis=1,
+            )
+        # flat cell indices grouped by island, for sampling
+        order = np.argsort(cell_labels, kind="stable")
+        self._cells = np.stack([floors, rows, cols], axis=1)[order]
+        self._island_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def island_of(self, points, resolve=False):
+        r"""Island id of ``(N, 3)`` points, ``-1`` off the navmesh.
+
+        Points near a navmesh edge can round onto a non-navigable cell, and
+        points between floors (e.g. on stairs) miss the floor slices. With
+        ``resolve=True`` such points are snapped and looked up with
+        ``pathfinder.get_island`` instead, when it is available.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        floors = np.abs(points[:, 1, None] - self.heights[None, :]).argmin(axis=1)
+        grid = np.rint(self.transform.world_to_grid(points)).astype(np.int64)
+        inside = self.transform.in_bounds(grid)
+        islands = np.full(len(points), -1, dtype=np.int32)
+        islands[inside] = self.labels[floors[inside], grid[inside, 1], grid[inside, 0]]
+        if resolve and self.navmesh_islands:
+            for i in np.flatnonzero(islands < 0):
+                snapped = np.asarray(self.pathfinder.snap_point(points[i]), dtype=np.float64)
+                if np.isfinite(snapped).all():
+                    islands[i] = self.pathfinder.get_island(snapped)
+        return islands
+
+    def same_island(self, a, b):
+        r"""Whether each pair of points in ``a`` and ``b`` is known to share an island."""
+        island_a = self.island_of(a, resolve=True)
+        island_b = self.island_of(b, resolve=True)
+        return (island_a == island_b) & (island_a >= 0)
+
+    def different_islands(self, a, b):
+        r"""Whether each pair of points is known to lie on different islands.
+
+        Pairs with an unknown island are not rejected, so this is the check
+        to gate a ``ShortestPath`` query on.
+        """
+        island_a = self.island_of(a, resolve=True)
+        island_b = self.island_of(b, resolve=True)
+        return (island_a != island_b) & (island_a >= 0) & (island_b >= 0)
+
+    def sample(self, num_points, island_id=None, rng=None, snap=True):
+        r"""Sample ``(num_points, 3)`` navigable points, uniformly by area.
+
+        When ``island_id`` is given, samples are restricted to that island.
+        With ``snap=True`` each point is snapped onto the navmesh for an exact
+        height; otherwise the floor height of the raster is used.
+        """
+        rng = np.random.default_rng(rng)
+        if island_id is None:
+            start, stop = 0, len(self._cells)
+        elif 0 <= island_id < self.num_islands:
+            start, stop = self._island_offsets[island_id], self._island_offsets[island_id + 1]
+        else:
+            start = stop = 0
+        if stop <= start:
+            raise ValueError(f"No navigable cells on island {island_id}")
+        cells = self._cells[rng.integers(start, stop, size=num_points)]
+        # jitter inside the cell
+        grid = cells[:, [2, 1]] + rng.uniform(-0.5, 0.5, size=(num_points, 2))
+        points = self.transform.grid_to_world(grid, self.heights[cells[:, 0]])
+        if snap:
+            island_index = -1 if island_id is None or not self.navmesh_islands else island_id
+            for i, point in enumerate(points):
+                points[i] = self.pathfinder.snap_point(point, island_index)
+        return points
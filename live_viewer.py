@@ -0,0 +1,110 @@
+import time
+
+from matplotlib import pyplot as plt
+
+from frame_compositor import FrameCompositor
+
+
+class LiveViewer:
+    r"""Long-lived matplotlib window for streaming sensor frames.
+
+    The figure, axes and one image artist per panel are created once.
+    Every :meth:`update` composes the frames with a
+    :class:`frame_compositor.FrameCompositor` and refreshes the artists in
+    place, blitting them over a cached background when the backend supports
+    it. A frame is dropped instead of queued when it arrives before the
+    previous draw has paid for itself (or sooner than ``max_fps`` allows),
+    so a slow display never stalls the simulation loop. :attr:`fps` is the
+    achieved display rate.
+    """
+
+    def __init__(self, compositor, titles=None, figsize=(12, 4), max_fps=None, smoothing=0.9):
+        self.compositor = compositor
+        self.min_interval = 0.0 if max_fps is None else 1.0 / max_fps
+        self.smoothing = smoothing
+        self.fps = 0.0
+        self.shown = 0
+        self.dropped = 0
+        self._last_draw = None
+        self._draw_time = 0.0
+
+        titles = titles or compositor.panels
+        width = compositor.width
+        self.figure, axes = plt.subplots(1, len(compositor.panels), figsize=figsize, squeeze=False)
+        self.artists = []
+        for i, (ax, title) in enumerate(zip(axes[0], titles)):
+            ax.axis("off")
+            ax.set_title(title)
+            panel = compositor.canvas[:, i * width : (i + 1) * width]
+            self.artists.append(ax.imshow(panel, animated=True))
+
+        self._background = None
+        self._blit = getattr(self.figure.canvas, "supports_blit", False)
+        # the cached background is stale after every full redraw, e.g. on resize
+        self.figure.canvas.mpl_connect("draw_event", self._on_draw)
+        plt.show(block=False)
+        self.figure.canvas.draw()
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        return cls(FrameCompositor.from_settings(settings), **kwargs)
+
+    def _on_draw(self, event):
+        if self._blit:
+            self._background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+            for artist in self.artists:
+                self.figure.draw_artist(artist)
+
+    def update(self, rgb=None, semantic=None, depth=None):
+        r"""Show one set of frames; returns ``False`` if the frame was dropped."""
+        now = time.perf_counter()
+        if self._last_draw is not None and now - self._last_draw < max(self.min_interval, self._draw_time):
+            self.dropped += 1
+            return False
+
+        self.compositor.compose(rgb, semantic, depth)
+        width = self.compositor.width
+        for i, artist in enumerate(self.artists):
+            artist.set_data(self.compositor.canvas[:, i * width : (i + 1) * width])
+        canvas = self.figure.canvas
+        if self._blit and self._background is not None:
+            canvas.restore_region(self._background)
+            for artist in self.artists:
+                self.figure.draw_artist(artist)
+            canvas.blit(self.figure.bbox)
+        else:
+            canvas.draw_idle()
+        canvas.flush_events()
+
+        end = time.perf_counter()
+        self._draw_time = end - now
+        if self._last_draw is not None:
+            rate = 1.0 / max(end - self._last_draw, 1e-6)
+            self.fps = rate if self.shown == 1 else self.smoothing * self.fps + (1 - self.smoothing) * rate
+        self._last_draw = end
+        self.shown += 1
+        return True
+
+    def update_observations(self, observations):
+        return self.update(
+            observations.get("color_sensor"), observations.get("semantic_sensor"), observations.get("depth_sensor")
+        )
+
+    @property
+    def stats(self):
+        r"""Frames shown and dropped so far, and the achieved display rate."""
+        return {"shown": self.shown, "dropped": self.dropped, "fps": self.fps}
+
+    def hold(self):
+        r"""Block until the window is closed, showing the last frame."""
+        if plt.fignum_exists(self.figure.number):
+            plt.show(block=True)
+
+    def close(self):
+        plt.close(self.figure)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
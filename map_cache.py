@@ -0,0 +1,117 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from utils import cached_navmesh_hash, forget_navmesh_hash, get_output_path, save_array_atomic
+
+
+class TopDownMapCache:
+    r"""Two-tier cache of top-down navmesh maps.
+
+    A top-down map depends only on the navmesh, the slice height and the
+    resolution, so entries are keyed by ``(kind, navmesh hash, height,
+    meters_per_pixel)``. ``kind`` is ``"sim"`` for
+    ``pathfinder.get_topdown_view`` and ``"lab"`` for
+    ``maps.get_topdown_map``.
+
+    Maps are stored as ``.npy`` files under ``output/topdown_maps`` and are
+    always returned as read-only memory-mapped arrays, so repeat runs and
+    parallel workers share the page cache instead of recomputing or copying.
+    Both tiers are evicted least-recently-used first by byte budget.
+    """
+
+    def __init__(self, cache_dir=None, memory_budget=256 << 20, disk_budget=4 << 30):
+        if cache_dir is None:
+            cache_dir = os.path.join(get_output_path(), "topdown_maps")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+
+    def get(self, pathfinder, height, meters_per_pixel=None, map_resolution=None, kind="sim", draw_border=True):
+        if kind not in ("sim", "lab"):
+            raise ValueError(f"Unknown map kind: {kind}")
+        if meters_per_pixel is None:
+            if map_resolution is None:
+                raise ValueError("Either meters_per_pixel or map_resolution is required")
+            from habitat.utils.visualizations import maps
+
+            meters_per_pixel = maps.calculate_meters_per_pixel(map_resolution, pathfinder=pathfinder)
+
+        key = self._make_key(pathfinder, height, meters_per_pixel, kind, draw_border)
+        topdown_map = self._memory.get(key)
+        if topdown_map is not None:
+            self._memory.move_to_end(key)
+            return topdown_map
+
+        path = os.path.join(self.cache_dir, key + ".npy")
+        computed = not os.path.exists(path)
+        if computed:
+            save_array_atomic(path, self._compute(pathfinder, height, meters_per_pixel, kind, draw_border))
+        else:
+            os.utime(path)
+        topdown_map = np.load(path, mmap_mode="r")
+        if computed:
+            self._evict_disk()
+        self._remember(key, topdown_map)
+        return topdown_map
+
+    def forget(self, pathfinder):
+        r"""Drop the memoized navmesh hash.
+
+        Recomputed navmeshes are detected by their bounds and navigable area;
+        this is only needed when a recompute leaves both unchanged.
+        """
+        forget_navmesh_hash(pathfinder)
+
+    def clear_memory(self):
+        self._memory.clear()
+        self._memory_bytes = 0
+
+    def _make_key(self, pathfinder, height, meters_per_pixel, kind, draw_border):
+        # round to millimetres so float noise in the height does not split entries
+        key = f"{kind}_{cached_navmesh_hash(pathfinder)[:16]}_h{height:.3f}_m{meters_per_pixel:.5f}"
+        if kind == "lab" and not draw_border:
+            key += "_noborder"
+        return key
+
+    @staticmethod
+    def _compute(pathfinder, height, meters_per_pixel, kind, draw_border):
+        if kind == "sim":
+            return np.asarray(pathfinder.get_topdown_view(meters_per_pixel, height))
+        from habitat.utils.visualizations import maps
+
+        return maps.get_topdown_map(pathfinder, height, draw_border=draw_border, meters_per_pixel=meters_per_pixel)
+
+    def _remember(self, key, topdown_map):
+        if topdown_map.nbytes > self.memory_budget:
+            return
+        self._memory[key] = topdown_map
+        self._memory_bytes += topdown_map.nbytes
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
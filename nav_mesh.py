@@ -1,15 +1,25 @@
 
 import math
+import os
 import habitat_sim
 import magnum as mn
 import numpy as np
 from habitat_sim.utils import common as utils
 from habitat.utils.visualizations import maps
-from matplotlib import pyplot as plt
 from depth_semantic_sensors import *
 from utils import *
+from topdown_transform import TopDownTransform
+from map_cache import TopDownMapCache
+from obstacle_field import ObstacleDistanceField
+from island_index import IslandIndex
+from navigable_sampler import NavigablePointSampler, worker_rng
+
+sim = get_sim()
+agent = sim.get_agent(sim_settings["default_agent"])
 
 meters_per_pixel = 0.1
+# top-down maps only depend on the navmesh, the height and the resolution
+map_cache = TopDownMapCache()
 
 print("NavMesh Area = " + str(sim.pathfinder.navigable_area))
 print("NavMesh Bounds = " + str(sim.pathfinder.get_bounds()))
@@ -19,10 +29,10 @@ assert sim.pathfinder.is_loaded, "Pathfinder not initialized, aborting."
 
 # Method 1: Get the topdown map from Habitat-Sim
 height = sim.pathfinder.get_bounds()[0][1]
-sim_topdown_map = sim.pathfinder.get_topdown_view(meters_per_pixel, height)
+sim_topdown_map = map_cache.get(sim.pathfinder, height, meters_per_pixel, kind="sim")
 
 # Method 2: Get the topdown map from Habitat-Lab
-hablab_topdown_map = maps.get_topdown_map(sim.pathfinder, height, meters_per_pixel=meters_per_pixel)
+hablab_topdown_map = map_cache.get(sim.pathfinder, height, meters_per_pixel, kind="lab")
 recolor_map = np.array([[255, 255, 255], [128, 128, 128], [0, 0, 0]], dtype=np.uint8)
 hablab_topdown_map = recolor_map[hablab_topdown_map]
 display_map(sim_topdown_map)
@@ -46,6 +56,12 @@ print(" point: " + str(hit_record.hit_pos))
 print(" normal: " + str(hit_record.hit_normal))
 print(" distance: " + str(hit_record.hit_dist))
 
+# The same clearance queries can be answered in bulk from a precomputed distance field,
+# which is cached next to the scene navmesh.
+navmesh_path = os.path.splitext(sim_settings["scene"])[0] + ".navmesh"
+obstacle_field = ObstacleDistanceField(sim.pathfinder, max_distance=max_search_radius, navmesh_path=navmesh_path)
+print("Distance to obstacle (field): " + str(obstacle_field.distance(nav_point, precise=True)[0]))
+
 vis_points = [nav_point]
 # HitRecord will have infinite distance if no valid point was found:
 if math.isinf(hit_record.hit_dist):
@@ -63,7 +79,7 @@ else:
 # Generates a topdown visualization of the NavMesh with sampled points overlaid.
 xy_vis_points = convert_points_to_topdown(sim.pathfinder, vis_points, meters_per_pixel)
 # use the y coordinate of the sampled nav_point for the map height slice
-top_down_map = maps.get_topdown_map(sim.pathfinder, height=nav_point[1], meters_per_pixel=meters_per_pixel)
+top_down_map = map_cache.get(sim.pathfinder, nav_point[1], meters_per_pixel, kind="lab")
 recolor_map = np.array([[255, 255, 255], [128, 128, 128], [0, 0, 0]], dtype=np.uint8)
 top_down_map = recolor_map[top_down_map]
 print("Display the map with key_point overlay:")
@@ -73,11 +89,22 @@ display_map(top_down_map, key_points=xy_vis_points)
 sim.pathfinder.seed(4)
 sample1 = sim.pathfinder.get_random_navigable_point()
 sample2 = sim.pathfinder.get_random_navigable_point()
+# Samples on different navmesh islands can never be connected, reject them before searching
+island_index = IslandIndex(sim.pathfinder)
+different_islands = bool(island_index.different_islands(sample1, sample2)[0])
+print("Samples on different islands : " + str(different_islands))
+
+# Many points can be drawn at once, filtered by clearance, island, height and separation,
+# with an independent seed stream per worker process
+sampler = NavigablePointSampler(sim.pathfinder, island_index=island_index, obstacle_field=obstacle_field)
+spawn_points = sampler.sample(10, rng=worker_rng(sim_settings["seed"]), min_clearance=0.3, min_separation=1.0)
+print("Spawn points : " + str(spawn_points))
 # Use ShortestPath module to compute path between samples.
 path = habitat_sim.ShortestPath()
 path.requested_start = sample1
 path.requested_end = sample2
-found_path = sim.pathfinder.find_path(path)
+# the query is skipped for samples the island check already ruled out
+found_path = not different_islands and sim.pathfinder.find_path(path)
 geodesic_distance = path.geodesic_distance
 path_points = path.points
 print("found_path : " + str(found_path))
@@ -90,18 +117,11 @@ if not found_path:
 
 meters_per_pixel = 0.025
 height = sim.scene_aabb.y().min
-top_down_map = recolor_map[maps.get_topdown_map(sim.pathfinder, height, meters_per_pixel=meters_per_pixel)]
+top_down_map = recolor_map[map_cache.get(sim.pathfinder, height, meters_per_pixel, kind="lab")]
 grid_dimensions = (top_down_map.shape[0], top_down_map.shape[1])
 # convert world trajectory points to maps module grid points
-trajectory = [
-    maps.to_grid(
-        path_point[2],
-        path_point[0],
-        grid_dimensions,
-        pathfinder=sim.pathfinder,
-    )
-    for path_point in path_points
-]
+grid_transform = TopDownTransform.from_pathfinder(sim.pathfinder, grid_shape=grid_dimensions, convention="lab")
+trajectory = grid_transform.world_to_grid(path_points).tolist()
 grid_tangent = mn.Vector2(trajectory[1][1] - trajectory[0][1], trajectory[1][0] - trajectory[0][0])
 path_initial_tangent = grid_tangent / grid_tangent.length()
 initial_angle = math.atan2(path_initial_tangent[0], path_initial_tangent[1])
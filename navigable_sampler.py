@@ -0,0 +1,117 @@
+import habitat_sim
+import numpy as np
+
+from island_index import IslandIndex
+from obstacle_field import ObstacleDistanceField
+
+
+def worker_rng(seed, worker_id=0):
+    r"""Independent, reproducible random stream for one worker process.
+
+    Streams are derived with ``SeedSequence`` spawn keys, so every
+    ``(seed, worker_id)`` pair gets the same numbers on every run without
+    the workers sharing, or serializing on, one RNG.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(worker_id,)))
+
+
+def _in_height_range(points, height_range):
+    return (points[:, 1] >= height_range[0]) & (points[:, 1] <= height_range[1])
+
+
+class NavigablePointSampler:
+    r"""Bulk sampler of navigable points with vectorized validation.
+
+    Candidates are drawn area-uniformly from the :class:`IslandIndex` raster
+    and filtered as whole arrays by floor height band, island and obstacle
+    clearance (:class:`ObstacleDistanceField`). Only accepted points are
+    snapped onto the navmesh. A minimum pairwise geodesic separation is
+    enforced greedily; the Euclidean distance is a lower bound of the
+    geodesic one, so a path query only runs for pairs that are closer than
+    the separation in straight line.
+    """
+
+    def __init__(self, pathfinder, island_index=None, obstacle_field=None, meters_per_pixel=0.1):
+        self.pathfinder = pathfinder
+        self.meters_per_pixel = meters_per_pixel
+        self.island_index = island_index if island_index is not None else IslandIndex(pathfinder, meters_per_pixel)
+        self._obstacle_field = obstacle_field
+
+    @property
+    def obstacle_field(self):
+        # only built when a clearance filter is requested
+        if self._obstacle_field is None:
+            self._obstacle_field = ObstacleDistanceField(
+                self.pathfinder, self.meters_per_pixel, heights=self.island_index.heights
+            )
+        return self._obstacle_field
+
+    def sample(
+        self,
+        num_points,
+        rng=None,
+        island_id=None,
+        min_clearance=None,
+        height_range=None,
+        min_separation=None,
+        max_rounds=20,
+        snap=True,
+    ):
+        r"""Return ``(num_points, 3)`` points that pass every requested filter.
+
+        ``height_range`` is checked again on the snapped points.
+        Raises ``RuntimeError`` when not enough points are found within
+        ``max_rounds`` oversampled batches.
+        """
+        rng = np.random.default_rng(rng)
+        accepted = np.empty((0, 3))
+        for _ in range(max_rounds):
+            remaining = num_points - len(accepted)
+            if remaining <= 0:
+                break
+            candidates = self.island_index.sample(max(2 * remaining, 64), island_id, rng, snap=False)
+            keep = np.ones(len(candidates), dtype=bool)
+            if height_range is not None:
+                keep &= _in_height_range(candidates, height_range)
+            if min_clearance is not None:
+                keep[keep] = self.obstacle_field.distance(candidates[keep]) >= min_clearance
+            candidates = candidates[keep]
+
+            if snap:
+                island_index = -1 if island_id is None or not self.island_index.navmesh_islands else island_id
+                for i, point in enumerate(candidates):
+                    candidates[i] = self.pathfinder.snap_point(point, island_index)
+                candidates = candidates[np.isfinite(candidates).all(axis=1)]
+                # snapping can move a point onto another floor; drop it and let the next round resample
+                if height_range is not None:
+                    candidates = candidates[_in_height_range(candidates, height_range)]
+
+            if min_separation is None:
+                accepted = np.concatenate([accepted, candidates[:remaining]])
+            else:
+                accepted = self._separate(accepted, candidates, remaining, min_separation)
+
+        if len(accepted) < num_points:
+            raise RuntimeError(f"Only found {len(accepted)} of {num_points} points matching the filters")
+        return accepted[:num_points]
+
+    def _separate(self, accepted, candidates, remaining, min_separation):
+        points = list(accepted)
+        path = habitat_sim.ShortestPath()
+        for candidate in candidates:
+            if remaining == 0:
+                break
+            if points:
+                euclidean = np.linalg.norm(np.asarray(points) - candidate, axis=1)
+                too_close = False
+                for point in np.asarray(points)[euclidean < min_separation]:
+                    path.requested_start = candidate
+                    path.requested_end = point
+                    if self.pathfinder.find_path(path) and path.geodesic_distance < min_separation:
+                        too_close = True
+                        break
+                if too_close:
+                    continue
+            points.append(candidate)
+            remaining -= 1
+        return np.asarray(points).reshape(-1, 3)
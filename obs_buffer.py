@@ -0,0 +1,65 @@
+import numpy as np
+
+from sensor_rig import observation_spec
+
+
+class ObservationRingBuffer:
+    r"""Fixed-capacity, preallocated observation history per sensor uuid.
+
+    Storage is allocated once from the agent's ``sensor_specifications`` and
+    each step's observations are copied into it, so long rollouts do not
+    allocate per step. Every frame is written twice, at ``slot`` and
+    ``slot + capacity`` of a ``2 * capacity`` array, which keeps the last
+    ``k <= capacity`` frames contiguous: :meth:`stacked` returns a view
+    instead of concatenating.
+    """
+
+    def __init__(self, sensor_specs, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._storage = {}
+        for sensor_spec in sensor_specs:
+            shape, dtype = observation_spec(sensor_spec)
+            self._storage[sensor_spec.uuid] = np.empty((2 * capacity,) + shape, dtype=dtype)
+        self._count = 0
+
+    @classmethod
+    def from_agent_config(cls, agent_cfg, capacity):
+        return cls(agent_cfg.sensor_specifications, capacity)
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def reset(self, observations):
+        r"""Start a new episode, padding the history with its first frame."""
+        for uuid, storage in self._storage.items():
+            np.copyto(storage, np.asarray(observations[uuid])[None])
+        self._count = 1
+
+    def push(self, observations):
+        if self._count == 0:
+            self.reset(observations)
+            return
+        slot = self._count % self.capacity
+        for uuid, storage in self._storage.items():
+            np.copyto(storage[slot], observations[uuid])
+            np.copyto(storage[slot + self.capacity], observations[uuid])
+        self._count += 1
+
+    def stacked(self, uuid, k):
+        r"""View of the last ``k`` frames of ``uuid``, oldest first.
+
+        Before ``k`` frames have been pushed since :meth:`reset`, the oldest
+        entries repeat the first frame of the episode. The view is
+        overwritten by later pushes; copy it to keep it.
+        """
+        if not 1 <= k <= self.capacity:
+            raise ValueError(f"k must be between 1 and the capacity {self.capacity}")
+        if self._count == 0:
+            raise RuntimeError("No observations pushed yet")
+        end = (self._count - 1) % self.capacity + self.capacity + 1
+        return self._storage[uuid][end - k : end]
+
+    def latest(self, uuid):
+        return self.stacked(uuid, 1)[0]
@@ -0,0 +1,232 @@
+import struct
+import time
+import zlib
+
+import numpy as np
+
+
+def _pack(dtype, shape, body):
+    dtype = np.dtype(dtype).str.encode()
+    header = struct.pack(f"<B{len(dtype)}sB{len(shape)}I", len(dtype), dtype, len(shape), *shape)
+    return header + bytes(body)
+
+
+def _unpack(data):
+    data = memoryview(data)
+    dtype_len = data[0]
+    dtype = np.dtype(bytes(data[1 : 1 + dtype_len]).decode())
+    offset = 1 + dtype_len
+    ndim = data[offset]
+    shape = struct.unpack_from(f"<{ndim}I", data, offset + 1)
+    return dtype, shape, data[offset + 1 + 4 * ndim :]
+
+
+class Codec:
+    r"""Encodes one observation frame to bytes and back.
+
+    Stateful codecs (e.g. :class:`DeltaCodec`) depend on the previous frames;
+    call :meth:`reset` before the first frame of every independently
+    decodable sequence.
+    """
+
+    name = None
+
+    def encode(self, frame):
+        raise NotImplementedError
+
+    def decode(self, data):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+    def config(self):
+        return {"name": self.name}
+
+
+class ZlibCodec(Codec):
+    r"""Lossless deflate of the raw frame bytes."""
+
+    name = "zlib"
+
+    def __init__(self, level=3):
+        self.level = level
+
+    def encode(self, frame):
+        frame = np.ascontiguousarray(frame)
+        return _pack(frame.dtype, frame.shape, zlib.compress(frame, self.level))
+
+    def decode(self, data):
+        dtype, shape, body = _unpack(data)
+        return np.frombuffer(zlib.decompress(body), dtype=dtype).reshape(shape)
+
+    def config(self):
+        return {"name": self.name, "level": self.level}
+
+
+class SemanticRLECodec(Codec):
+    r"""Lossless palette plus run-length codec for semantic id frames.
+
+    Semantic frames hold few distinct instance ids in long horizontal runs.
+    The frame is split into runs, the run values are replaced by indices into
+    a palette of the distinct ids, and the palette, run indices and run
+    lengths are stored with the smallest integer types that fit.
+    """
+
+    name = "semantic_rle"
+
+    def encode(self, frame):
+        frame = np.ascontiguousarray(frame)
+        flat = frame.ravel()
+        starts = np.flatnonzero(np.concatenate([[True], flat[1:] != flat[:-1]]))
+        if not flat.size:
+            # an empty frame has no runs
+            starts = starts[:0]
+        lengths = np.diff(np.append(starts, flat.size))
+        palette, values = np.unique(flat[starts], return_inverse=True)
+        values = values.astype(np.min_scalar_type(max(len(palette) - 1, 0)))
+        lengths = lengths.astype(np.min_scalar_type(int(lengths.max(initial=0))))
+        body = struct.pack("<II2s2s", len(palette), len(starts), values.dtype.char.encode().ljust(2), lengths.dtype.char.encode().ljust(2))
+        body += palette.astype(frame.dtype).tobytes() + values.tobytes() + lengths.tobytes()
+        return _pack(frame.dtype, frame.shape, body)
+
+    def decode(self, data):
+        dtype, shape, body = _unpack(data)
+        num_palette, num_runs, values_char, lengths_char = struct.unpack_from("<II2s2s", body)
+        values_dtype = np.dtype(values_char.decode().strip())
+        lengths_dtype = np.dtype(lengths_char.decode().strip())
+        offset = struct.calcsize("<II2s2s")
+        palette = np.frombuffer(body, dtype=dtype, count=num_palette, offset=offset)
+        offset += num_palette * dtype.itemsize
+        values = np.frombuffer(body, dtype=values_dtype, count=num_runs, offset=offset)
+        offset += num_runs * values_dtype.itemsize
+        lengths = np.frombuffer(body, dtype=lengths_dtype, count=num_runs, offset=offset)
+        return np.repeat(palette[values], lengths).reshape(shape)
+
+
+class DepthCodec(Codec):
+    r"""Quantizing depth codec.
+
+    ``mode="mm"`` stores uint16 millimetres and ``mode="float16"`` stores
+    half floats; both clip depth to ``[0, max_range]`` metres. The quantized
+    frame is passed to ``inner`` (zlib by default), which may be a
+    :class:`DeltaCodec` to encode differences between consecutive frames.
+    """
+
+    name = "depth"
+
+    def __init__(self, max_range=10.0, mode="mm", inner=None):
+        if mode not in ("mm", "float16"):
+            raise ValueError(f"Unknown depth mode: {mode}")
+        if mode == "mm" and max_range > 65.535:
+            raise ValueError("Millimetre depth in uint16 is limited to 65.535 m")
+        self.max_range = max_range
+        self.mode = mode
+        self.inner = ZlibCodec() if inner is None else inner
+
+    def encode(self, frame):
+        depth = np.clip(frame, 0.0, self.max_range)
+        if self.mode == "mm":
+            quantized = np.rint(depth * 1000.0).astype(np.uint16)
+        else:
+            quantized = depth.astype(np.float16)
+        return self.inner.encode(quantized)
+
+    def decode(self, data):
+        quantized = self.inner.decode(data)
+        if self.mode == "mm":
+            return quantized.astype(np.float32) / 1000.0
+        return quantized.astype(np.float32)
+
+    def reset(self):
+        self.inner.reset()
+
+    def config(self):
+        return {"name": self.name, "max_range": self.max_range, "mode": self.mode, "inner": self.inner.config()}
+
+
+class DeltaCodec(Codec):
+    r"""Encodes integer frames as the difference to the previous frame.
+
+    Differences use wrap-around integer arithmetic, so decoding is exact.
+    Every ``keyframe_interval`` frames, and after :meth:`reset`, a full frame
+    is stored so decoding can resume there.
+    """
+
+    name = "delta"
+
+    def __init__(self, inner=None, keyframe_interval=30):
+        self.inner = ZlibCodec() if inner is None else inner
+        self.keyframe_interval = keyframe_interval
+        self.reset()
+
+    def reset(self):
+        self._previous = None
+        self._count = 0
+        self.inner.reset()
+
+    def _is_keyframe(self):
+        return self._previous is None or self._count % self.keyframe_interval == 0
+
+    def encode(self, frame):
+        frame = np.asarray(frame)
+        if frame.dtype.kind not in "ui":
+            raise ValueError("DeltaCodec only supports integer frames, quantize floats first")
+        keyframe = self._is_keyframe()
+        payload = frame if keyframe else np.subtract(frame, self._previous, dtype=frame.dtype)
+        self._previous = frame.copy()
+        self._count += 1
+        return bytes([keyframe]) + self.inner.encode(payload)
+
+    def decode(self, data):
+        payload = self.inner.decode(memoryview(data)[1:])
+        frame = payload if data[0] else np.add(self._previous, payload, dtype=payload.dtype)
+        self._previous = frame.copy()
+        self._count += 1
+        return frame
+
+    def config(self):
+        return {"name": self.name, "keyframe_interval": self.keyframe_interval, "inner": self.inner.config()}
+
+
+CODECS = {codec.name: codec for codec in (ZlibCodec, SemanticRLECodec, DepthCodec, DeltaCodec)}
+
+
+def make_codec(config):
+    r"""Rebuild a codec from :meth:`Codec.config`."""
+    config = dict(config)
+    codec = CODECS[config.pop("name")]
+    if "inner" in config:
+        config["inner"] = make_codec(config["inner"])
+    return codec(**config)
+
+
+def measure_codec(codec, frames):
+    r"""Compression ratio, throughput and error of ``codec`` on ``frames``.
+
+    Throughput is reported in megabytes of raw frame data per second.
+    """
+    frames = [np.asarray(frame) for frame in frames]
+    raw_bytes = sum(frame.nbytes for frame in frames)
+
+    codec.reset()
+    start = time.perf_counter()
+    encoded = [codec.encode(frame) for frame in frames]
+    encode_time = time.perf_counter() - start
+
+    codec.reset()
+    start = time.perf_counter()
+    decoded = [codec.decode(data) for data in encoded]
+    decode_time = time.perf_counter() - start
+
+    encoded_bytes = sum(len(data) for data in encoded)
+    max_error = max(
+        (float(np.max(np.abs(frame.astype(np.float64) - result.astype(np.float64)), initial=0.0)) for frame, result in zip(frames, decoded)),
+        default=0.0,
+    )
+    return {
+        "ratio": raw_bytes / max(encoded_bytes, 1),
+        "encode_mb_s": raw_bytes / 1e6 / max(encode_time, 1e-9),
+        "decode_mb_s": raw_bytes / 1e6 / max(decode_time, 1e-9),
+        "max_abs_error": max_error,
+    }
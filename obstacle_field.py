@@ -0,0 +1,147 @@
+import math
+import os
+
+import numpy as np
+from scipy import ndimage
+
+from topdown_transform import TopDownTransform
+from utils import get_floor_heights, hash_file, save_npz_atomic
+
+
+class ObstacleDistanceField:
+    r"""Precomputed obstacle-distance raster for batched clearance queries.
+
+    For every floor, the navigable top-down view is turned into a Euclidean
+    distance transform (metres to the closest non-navigable cell) together
+    with the unit xz vector pointing away from that obstacle, which matches
+    the ``hit_normal`` convention of ``pathfinder.closest_obstacle_surface_point``.
+    Distances are clipped at ``max_distance``, like the search radius of
+    ``pathfinder.distance_to_closest_obstacle``.
+
+    When ``navmesh_path`` is given, the rasters are cached next to the navmesh
+    file and reused as long as the navmesh file does not change.
+    """
+
+    def __init__(self, pathfinder, meters_per_pixel=0.05, heights=None, max_distance=2.0, navmesh_path=None):
+        self.pathfinder = pathfinder
+        self.meters_per_pixel = meters_per_pixel
+        self.max_distance = max_distance
+
+        cache_path = None
+        navmesh_key = None
+        if navmesh_path is not None and os.path.exists(navmesh_path):
+            cache_path = f"{os.path.splitext(navmesh_path)[0]}.obstacle_field_{meters_per_pixel:g}_{max_distance:g}.npz"
+            navmesh_key = hash_file(navmesh_path)
+
+        if cache_path is not None and os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                cached_heights = cached["heights"]
+                if str(cached["navmesh_key"]) == navmesh_key and (
+                    heights is None
+                    or (len(cached_heights) == len(heights) and np.allclose(cached_heights, heights))
+                ):
+                    self.heights = cached["heights"]
+                    self.distances = cached["distances"]
+                    self.normals = cached["normals"]
+                    self.transform = self._make_transform()
+                    return
+
+        if heights is None:
+            heights = get_floor_heights(pathfinder)
+        self.heights = np.asarray(heights, dtype=np.float64)
+        self.distances, self.normals = self._build()
+        self.transform = self._make_transform()
+        if cache_path is not None:
+            # parallel workers may be loading the cache, so it is only ever replaced whole
+            save_npz_atomic(
+                cache_path,
+                navmesh_key=navmesh_key,
+                heights=self.heights,
+                distances=self.distances,
+                normals=self.normals,
+            )
+
+    def _make_transform(self):
+        return TopDownTransform.from_pathfinder(
+            self.pathfinder, self.meters_per_pixel, grid_shape=self.distances.shape[1:]
+        )
+
+    def _build(self):
+        distances = []
+        normals = []
+        for height in self.heights:
+            navigable = np.asarray(self.pathfinder.get_topdown_view(self.meters_per_pixel, height), dtype=bool)
+            distance, (rows, cols) = ndimage.distance_transform_edt(navigable, return_indices=True)
+            # distance between cell centers, the obstacle surface is half a cell closer
+            distance = np.clip((distance - 0.5) * self.meters_per_pixel, 0.0, self.max_distance)
+            offset = np.stack(
+                [
+                    np.arange(navigable.shape[1])[None, :] - cols,
+                    np.arange(navigable.shape[0])[:, None] - rows,
+                ],
+                axis=-1,
+            ).astype(np.float32)
+            norm = np.linalg.norm(offset, axis=-1, keepdims=True)
+            distances.append(distance.astype(np.float32))
+            normals.append(np.divide(offset, norm, out=np.zeros_like(offset), where=norm > 0))
+        return np.stack(distances), np.stack(normals)
+
+    def floor_index(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        return np.abs(points[:, 1, None] - self.heights[None, :]).argmin(axis=1)
+
+    def distance(self, points, precise=False):
+        r"""Distance to the closest obstacle for ``(N, 3)`` points.
+
+        Values are bilinearly interpolated from the raster. With
+        ``precise=True``, points within one cell diagonal of an obstacle,
+        where the raster error is largest, are re-queried exactly with
+        ``pathfinder.distance_to_closest_obstacle``.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        floors = self.floor_index(points)
+        grid = self.transform.world_to_grid(points)
+        rows, cols = self.distances.shape[1:]
+        u = np.clip(grid[:, 0], 0, cols - 1)
+        v = np.clip(grid[:, 1], 0, rows - 1)
+        c0 = np.clip(u.astype(np.int64), 0, max(cols - 2, 0))
+        r0 = np.clip(v.astype(np.int64), 0, max(rows - 2, 0))
+        c1 = np.minimum(c0 + 1, cols - 1)
+        r1 = np.minimum(r0 + 1, rows - 1)
+        du = u - c0
+        dv = v - r0
+        field = self.distances
+        distance = (
+            field[floors, r0, c0] * (1 - du) * (1 - dv)
+            + field[floors, r0, c1] * du * (1 - dv)
+            + field[floors, r1, c0] * (1 - du) * dv
+            + field[floors, r1, c1] * du * dv
+        )
+        # points outside the raster are not navigable
+        distance[~self.transform.in_bounds(grid)] = 0.0
+
+        if precise:
+            for i in np.flatnonzero(distance < self.meters_per_pixel * math.sqrt(2)):
+                distance[i] = self.pathfinder.distance_to_closest_obstacle(points[i], self.max_distance)
+        return distance
+
+    def nearest_obstacle(self, points):
+        r"""Approximate ``closest_obstacle_surface_point`` for ``(N, 3)`` points.
+
+        Returns ``(hit_pos, hit_normal, hit_dist)`` arrays. ``hit_dist`` is
+        infinite where no obstacle lies within ``max_distance``.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        floors = self.floor_index(points)
+        grid = self.transform.world_to_grid(points)
+        rows, cols = self.distances.shape[1:]
+        r = np.clip(np.rint(grid[:, 1]).astype(np.int64), 0, rows - 1)
+        c = np.clip(np.rint(grid[:, 0]).astype(np.int64), 0, cols - 1)
+        hit_dist = self.distances[floors, r, c].astype(np.float64)
+        normal_xz = self.normals[floors, r, c]
+        hit_normal = np.zeros_like(points)
+        hit_normal[:, 0] = normal_xz[:, 0]
+        hit_normal[:, 2] = normal_xz[:, 1]
+        hit_pos = points - hit_normal * hit_dist[:, None]
+        hit_dist[hit_dist >= self.max_distance] = np.inf
+        return hit_pos, hit_normal, hit_dist
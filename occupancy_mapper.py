@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+
+from depth_projection import get_ray_table, quaternion_to_matrix
+from topdown_transform import TopDownTransform
+
+
+class OccupancyMapper:
+    r"""Incremental 2D log-odds occupancy and height map built from depth.
+
+    The grid uses the Habitat-Lab convention of ``maps.get_topdown_map``
+    (``(row, col)`` with row along world z), so it overlays directly on the
+    ground-truth top-down maps. Each :meth:`update` back-projects a strided
+    depth frame and only touches the cells inside the current view frustum:
+
+    * points in the ``[obstacle_min, obstacle_max]`` band above the floor
+      mark their cell occupied,
+    * floor points mark their cell free,
+    * every strided image column carves free space along its ray up to the
+      closest obstacle seen in that column.
+
+    The per-step cost is bounded by the number of sampled pixels and the
+    depth range, not by the map size. With ``num_classes`` the mapper also
+    accumulates per-class observation counts of obstacle points from
+    semantic frames whose values are class ids.
+    """
+
+    def __init__(
+        self,
+        transform,
+        floor_height,
+        sensor_spec,
+        max_depth=5.0,
+        pixel_stride=4,
+        obstacle_min=0.1,
+        obstacle_max=1.5,
+        hit_log_odds=0.85,
+        miss_log_odds=-0.4,
+        clamp_log_odds=5.0,
+        num_classes=None,
+    ):
+        if transform.convention != "lab":
+            raise ValueError("OccupancyMapper uses the Habitat-Lab grid convention")
+        self.transform = transform
+        self.floor_height = floor_height
+        self.max_depth = max_depth
+        self.pixel_stride = pixel_stride
+        self.obstacle_min = obstacle_min
+        self.obstacle_max = obstacle_max
+        self.hit_log_odds = hit_log_odds
+        self.miss_log_odds = miss_log_odds
+        self.clamp_log_odds = clamp_log_odds
+
+        height, width = (int(value) for value in sensor_spec.resolution)
+        ray_table = get_ray_table(
+            height, width, float(sensor_spec.hfov), tuple(float(value) for value in sensor_spec.position)
+        )
+        self._directions = ray_table.directions.reshape(height, width, 3)[::pixel_stride, ::pixel_stride]
+        self._origin = ray_table.origin.astype(np.float64)
+
+        # carve in half-cell steps so no cell along a ray is skipped
+        self._carve_step = 0.5 * transform.meters_per_pixel
+        self._carve_offsets = np.arange(math.ceil(max_depth / self._carve_step)) * self._carve_step
+
+        self.log_odds = np.zeros(transform.grid_shape, dtype=np.float32)
+        self.height_map = np.full(transform.grid_shape, -np.inf, dtype=np.float32)
+        self.semantic_counts = None
+        if num_classes is not None:
+            self.semantic_counts = np.zeros((num_classes,) + transform.grid_shape, dtype=np.float32)
+
+    @classmethod
+    def from_pathfinder(cls, pathfinder, floor_height, sensor_spec, meters_per_pixel=0.05, grid_shape=None, **kwargs):
+        transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel, grid_shape, convention="lab")
+        return cls(transform, floor_height, sensor_spec, **kwargs)
+
+    @property
+    def occupied(self):
+        return self.log_odds > 0
+
+    @property
+    def free(self):
+        return self.log_odds < 0
+
+    @property
+    def explored(self):
+        return self.log_odds != 0
+
+    def probability(self):
+        return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    def _cells(self, points):
+        cells = self.transform.world_to_grid(points)
+        return cells[self.transform.in_bounds(cells)]
+
+    def update(self, depth, position, rotation, semantic=None):
+        r"""Fuse one depth frame taken at the given agent pose.
+
+        ``rotation`` is a wxyz quaternion. Returns the ``(r0, r1, c0, c1)``
+        bounding rectangle of the cells that changed, or ``None``.
+        """
+        s = self.pixel_stride
+        depth = np.asarray(depth, dtype=np.float64)[::s, ::s]
+        if depth.ndim == 3:
+            depth = depth[..., 0]
+        matrix = quaternion_to_matrix(rotation)[0]
+        position = np.asarray(position, dtype=np.float64)
+        points = (self._directions * depth[..., None] + self._origin) @ matrix.T + position
+
+        valid = (depth > 0) & (depth <= self.max_depth)
+        relative_height = points[..., 1] - self.floor_height
+        obstacle = valid & (relative_height >= self.obstacle_min) & (relative_height <= self.obstacle_max)
+        floor = valid & (relative_height < self.obstacle_min)
+
+        hit_cells = self._cells(points[obstacle])
+        free_cells = [self._cells(points[floor]), self._carve(points, obstacle, floor, matrix, position)]
+        free_cells = np.concatenate(free_cells)
+        touched = np.concatenate([hit_cells, free_cells])
+        if not len(touched):
+            return None
+
+        hit_ids = np.unique(np.ravel_multi_index(hit_cells.T, self.log_odds.shape))
+        free_ids = np.setdiff1d(np.ravel_multi_index(free_cells.T, self.log_odds.shape), hit_ids)
+        flat_log_odds = self.log_odds.reshape(-1)
+        # clamp only the updated cells, so the cost stays independent of the map size
+        for ids, delta in ((hit_ids, self.hit_log_odds), (free_ids, self.miss_log_odds)):
+            flat_log_odds[ids] = np.clip(flat_log_odds[ids] + delta, -self.clamp_log_odds, self.clamp_log_odds)
+
+        seen_points = points[obstacle | floor]
+        seen_cells = self.transform.world_to_grid(seen_points)
+        inside = self.transform.in_bounds(seen_cells)
+        np.maximum.at(self.height_map, tuple(seen_cells[inside].T), seen_points[inside, 1])
+
+        if self.semantic_counts is not None and semantic is not None:
+            labels = np.asarray(semantic)[::s, ::s][obstacle]
+            cells = self.transform.world_to_grid(points[obstacle])
+            keep = self.transform.in_bounds(cells) & (labels >= 0) & (labels < len(self.semantic_counts))
+            np.add.at(self.semantic_counts, (labels[keep].astype(np.int64), cells[keep, 0], cells[keep, 1]), 1.0)
+
+        return (
+            int(touched[:, 0].min()),
+            int(touched[:, 0].max()) + 1,
+            int(touched[:, 1].min()),
+            int(touched[:, 1].max()) + 1,
+        )
+
+    def _carve(self, points, obstacle, floor, matrix, position):
+        # horizontal range per image column: the closest obstacle, else the farthest floor point
+        camera = matrix @ self._origin + position
+        horizontal = np.linalg.norm(points[..., [0, 2]] - camera[[0, 2]], axis=-1)
+        obstacle_range = np.where(obstacle, horizontal, np.inf).min(axis=0)
+        floor_range = np.where(floor, horizontal, -np.inf).max(axis=0)
+        ranges = np.where(np.isfinite(obstacle_range), obstacle_range, floor_range)
+        columns = np.flatnonzero(np.isfinite(ranges) & (ranges > 0))
+        if not len(columns):
+            return np.empty((0, 2), dtype=np.int64)
+
+        # ray direction of each column projected onto the floor plane
+        directions = self._directions[0, columns] @ matrix.T
+        directions = directions[:, [0, 2]] / np.linalg.norm(directions[:, [0, 2]], axis=1, keepdims=True)
+        # stop one step short of the end point so the obstacle cell itself is not carved
+        reach = self._carve_offsets[None, :] < (ranges[columns, None] - self._carve_step)
+        offsets = np.broadcast_to(self._carve_offsets, reach.shape)[reach]
+        column_index = np.nonzero(reach)[0]
+        samples = np.empty((len(offsets), 3))
+        samples[:, 0] = camera[0] + directions[column_index, 0] * offsets
+        samples[:, 1] = self.floor_height
+        samples[:, 2] = camera[2] + directions[column_index, 1] * offsets
+        return self._cells(samples)
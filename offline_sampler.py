@@ -0,0 +1,144 @@
+import queue
+import threading
+
+import numpy as np
+
+from rollout_recorder import RolloutReader
+
+
+class OfflineTrajectorySampler:
+    r"""Random minibatches of ``(obs, action, next_obs)`` from recorded rollouts.
+
+    A global index over all transitions of the episodes written by
+    :class:`rollout_recorder.RolloutRecorder` is built once; a transition is
+    a step ``t`` of an episode that has a successor ``t + 1``. Minibatches
+    are drawn uniformly, or proportionally to per-transition ``priorities``,
+    and gathered straight from the memory-mapped chunks.
+
+    Background threads prefetch batches into a fixed pool of preallocated
+    batch buffers. A batch returned by :meth:`sample` stays valid until
+    :meth:`release` hands its buffer back, so steady-state sampling does not
+    allocate. With ``world_size > 1`` every rank samples only from its own
+    strided shard of the global index.
+    """
+
+    def __init__(
+        self,
+        paths,
+        batch_size,
+        streams=None,
+        priorities=None,
+        rank=0,
+        world_size=1,
+        num_workers=2,
+        num_buffers=4,
+        seed=0,
+    ):
+        self.readers = [RolloutReader(path) for path in paths]
+        self.batch_size = batch_size
+        if streams is None:
+            # observations only, the transition action is gathered separately
+            streams = [name for name in self.readers[0].streams if name not in ("action", "position", "rotation")]
+        elif "action" in streams:
+            raise ValueError("'action' is always sampled as the transition action, it is not an observation stream")
+        self.streams = list(streams)
+
+        transitions = [max(len(reader) - 1, 0) for reader in self.readers]
+        episode_ids = np.repeat(np.arange(len(self.readers)), transitions)
+        steps = np.concatenate([np.arange(count) for count in transitions]) if transitions else np.empty(0, np.int64)
+        # shard the global index across data-parallel ranks
+        self.episode_ids = episode_ids[rank::world_size]
+        self.steps = steps.astype(np.int64)[rank::world_size]
+        if not len(self.steps):
+            raise ValueError("No transitions available for this rank")
+
+        self._probabilities = None
+        if priorities is not None:
+            self.update_priorities(priorities)
+
+        self._free = queue.Queue()
+        for _ in range(num_buffers):
+            self._free.put(self._allocate())
+        self._ready = queue.Queue(maxsize=num_buffers)
+        self._stop = threading.Event()
+        self._seed_sequence = np.random.SeedSequence([seed, rank])
+        self._workers = [
+            threading.Thread(target=self._prefetch, args=(child_seed,), daemon=True)
+            for child_seed in self._seed_sequence.spawn(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def __len__(self):
+        return len(self.steps)
+
+    def update_priorities(self, priorities):
+        r"""Set sampling priorities, one per transition of this rank's shard."""
+        priorities = np.asarray(priorities, dtype=np.float64)
+        if len(priorities) != len(self.steps):
+            raise ValueError(f"Expected {len(self.steps)} priorities, got {len(priorities)}")
+        self._probabilities = priorities / priorities.sum()
+
+    def _allocate(self):
+        buffers = {"action": np.empty(self.batch_size, dtype=np.int16), "index": np.empty(self.batch_size, np.int64)}
+        for name in self.streams:
+            shape, dtype = self.readers[0].spec(name)
+            buffers[name] = np.empty((self.batch_size,) + shape, dtype=dtype)
+            buffers["next_" + name] = np.empty((self.batch_size,) + shape, dtype=dtype)
+        return buffers
+
+    def _prefetch(self, seed_sequence):
+        rng = np.random.default_rng(seed_sequence)
+        # readers cache decoded chunks, so every thread keeps its own
+        readers = [RolloutReader(reader.path) for reader in self.readers]
+        while not self._stop.is_set():
+            try:
+                buffers = self._free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            index = rng.choice(len(self.steps), size=self.batch_size, p=self._probabilities)
+            self._fill(buffers, index, readers)
+            self._ready.put(buffers)
+
+    def _fill(self, buffers, index, readers):
+        buffers["index"][:] = index
+        episode_ids = self.episode_ids[index]
+        steps = self.steps[index]
+        for episode_id in np.unique(episode_ids):
+            mask = episode_ids == episode_id
+            reader = readers[episode_id]
+            rows = np.flatnonzero(mask)
+            episode_steps = steps[mask]
+            if "action" in reader.streams:
+                # the action recorded with step t + 1 is the one that led from t to t + 1
+                buffers["action"][rows] = reader.read("action", episode_steps + 1)
+            for name in self.streams:
+                buffers[name][rows] = reader.read(name, episode_steps)
+                buffers["next_" + name][rows] = reader.read(name, episode_steps + 1)
+
+    def sample(self, timeout=None):
+        r"""Next prefetched batch, a dict of arrays keyed by stream name.
+
+        ``next_<stream>`` holds the following step, ``action`` the action
+        taken in between and ``index`` the positions in this rank's index
+        (for :meth:`update_priorities`).
+        """
+        return self._ready.get(timeout=timeout)
+
+    def release(self, batch):
+        r"""Return a batch's buffers to the pool once it has been consumed."""
+        self._free.put(batch)
+
+    def close(self):
+        self._stop.set()
+        # unblock workers waiting on a full ready queue
+        while not self._ready.empty():
+            self._free.put(self._ready.get())
+        for worker in self._workers:
+            worker.join(timeout=1.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
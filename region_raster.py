@@ -0,0 +1,119 @@
+import hashlib
+import os
+
+import numpy as np
+
+from topdown_transform import TopDownTransform
+from utils import get_output_path, save_npz_atomic, scene_file_key
+
+
+class RegionRaster:
+    r"""Per-level region label raster aligned with the top-down view grid.
+
+    Built once from the region bounding boxes of a
+    :class:`semantic_index.SemanticSceneIndex`: every region is painted
+    onto the grid of its level (``pathfinder.get_topdown_view`` grid,
+    ``"sim"`` convention), largest first, so that where boxes overlap the
+    smaller, more specific region wins; equal areas keep the index order.
+    Cells outside every region are ``-1``.
+
+    A batch of points is then mapped to ``(level, region, category)`` rows
+    by a level height lookup and one raster gather, instead of testing
+    every ``region.aabb`` per step.
+    """
+
+    def __init__(self, labels, transform, level_lower, level_upper, region_categories):
+        self.labels = labels
+        self.transform = transform
+        self.level_lower = level_lower
+        self.level_upper = level_upper
+        self.region_categories = region_categories
+
+    @classmethod
+    def build(cls, scene_index, pathfinder, meters_per_pixel=0.1):
+        transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel)
+        level_lower = scene_index.level_centers[:, 1] - scene_index.level_sizes[:, 1] / 2
+        level_upper = scene_index.level_centers[:, 1] + scene_index.level_sizes[:, 1] / 2
+        raster = cls(
+            np.full((max(len(level_lower), 1),) + transform.grid_shape, -1, dtype=np.int32),
+            transform,
+            level_lower,
+            level_upper,
+            scene_index.region_category_ids,
+        )
+
+        centers = scene_index.region_centers.astype(np.float64)
+        half_sizes = scene_index.region_sizes.astype(np.float64) / 2
+        levels = scene_index.region_levels.copy()
+        # regions outside the hierarchy go to the level holding their center
+        orphans = levels < 0
+        levels[orphans] = raster._levels_of(centers[orphans, 1])
+        levels = np.maximum(levels, 0)
+
+        # cells whose centers fall inside the box, integer grid points are cell centers
+        lower = np.ceil(transform.world_to_grid(centers - half_sizes)).astype(np.int64)
+        upper = np.floor(transform.world_to_grid(centers + half_sizes)).astype(np.int64) + 1
+        lower = np.maximum(lower, 0)
+        upper = np.minimum(upper, np.array(transform.grid_shape[::-1]))
+        areas = half_sizes[:, 0] * half_sizes[:, 2]
+        for region in np.argsort(-areas, kind="stable"):
+            (c0, r0), (c1, r1) = lower[region], upper[region]
+            raster.labels[levels[region], r0:r1, c0:c1] = region
+        return raster
+
+    @classmethod
+    def from_scene(cls, scene_index, pathfinder, meters_per_pixel=0.1, scene_path=None, cache_dir=None):
+        r"""Raster for a scene, cached under ``output/region_rasters`` when
+        ``scene_path`` is given."""
+        if scene_path is None or not os.path.exists(scene_path):
+            return cls.build(scene_index, pathfinder, meters_per_pixel)
+        lower_bound, upper_bound = pathfinder.get_bounds()
+        bounds_key = "_".join(f"{value:.3f}" for value in (*lower_bound, *upper_bound))
+        key = hashlib.sha1(f"{scene_file_key(scene_path)}_{bounds_key}_{meters_per_pixel:g}".encode()).hexdigest()[:24]
+        if cache_dir is None:
+            cache_dir = os.path.join(get_output_path(), "region_rasters")
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, key + ".npz")
+
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                labels = cached["labels"]
+                transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel, grid_shape=labels.shape[1:])
+                return cls(labels, transform, cached["level_lower"], cached["level_upper"], cached["region_categories"])
+
+        raster = cls.build(scene_index, pathfinder, meters_per_pixel)
+        save_npz_atomic(
+            cache_path,
+            labels=raster.labels,
+            level_lower=raster.level_lower,
+            level_upper=raster.level_upper,
+            region_categories=raster.region_categories,
+        )
+        return raster
+
+    def _levels_of(self, heights):
+        if not len(self.level_lower):
+            return np.full(len(heights), -1, dtype=np.int64)
+        # vertical distance to each level's box, zero inside; ties go to the lower index
+        heights = np.asarray(heights, dtype=np.float64)[:, None]
+        gap = np.maximum(self.level_lower[None, :] - heights, 0) + np.maximum(heights - self.level_upper[None, :], 0)
+        return gap.argmin(axis=1)
+
+    def lookup(self, points):
+        r"""``(level, region, category)`` rows of ``(N, 3)`` points.
+
+        Level and region are rows of the :class:`semantic_index.SemanticSceneIndex`
+        tables. Points between levels go to the vertically closest level, and
+        the level is ``-1`` only for scenes without levels. Region and
+        category (the region's category id) are ``-1`` outside any region.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        levels = self._levels_of(points[:, 1])
+        grid = np.rint(self.transform.world_to_grid(points)).astype(np.int64)
+        inside = self.transform.in_bounds(grid)
+        regions = np.full(len(points), -1, dtype=np.int32)
+        floors = np.maximum(levels, 0)[inside]
+        regions[inside] = self.labels[floors, grid[inside, 1], grid[inside, 0]]
+        # row -1 picks the appended -1
+        categories = np.append(self.region_categories, -1)[regions]
+        return levels, regions, categories
@@ -0,0 +1,229 @@
+import io
+import json
+import os
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from obs_codecs import make_codec
+from sensor_rig import observation_spec
+from utils import write_atomic
+
+INDEX_FILE = "index.json"
+
+
+class RolloutRecorder:
+    r"""Append-only, chunked on-disk recorder for one rollout.
+
+    Every stream (one per sensor uuid, plus ``action``, ``position`` and
+    ``rotation``) is buffered in a preallocated chunk of ``chunk_size``
+    steps. Full chunks are written to ``<path>/<stream>/<chunk>.npy``, so
+    memory use stays constant however long the episode is. With
+    ``compression="zlib"`` chunks are stored deflated instead; uncompressed
+    chunks can be memory-mapped by :class:`RolloutReader`. ``codecs`` maps
+    stream names to per-frame :class:`obs_codecs.Codec` instances, e.g. a
+    ``SemanticRLECodec`` for ``semantic_sensor``; such streams are stored as
+    encoded frames, and stateful codecs are reset at every chunk so chunks
+    decode independently.
+
+    ``index.json`` describes the streams and their chunks and is rewritten
+    after every flushed chunk, so an interrupted recording stays readable
+    up to its last full chunk.
+    """
+
+    def __init__(
+        self,
+        path,
+        stream_specs,
+        chunk_size=256,
+        compression=None,
+        level=3,
+        codecs=None,
+        action_names=None,
+        metadata=None,
+    ):
+        if compression not in (None, "zlib"):
+            raise ValueError(f"Unknown compression: {compression}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.level = level
+        self.codecs = dict(codecs or {})
+        self.action_names = list(action_names or [])
+        self.num_steps = 0
+        self._fill = 0
+        self._buffers = {}
+        self._index = {
+            "version": 1,
+            "chunk_size": chunk_size,
+            "num_steps": 0,
+            "action_names": self.action_names,
+            "metadata": metadata or {},
+            "streams": {},
+        }
+        for name, (shape, dtype) in stream_specs.items():
+            dtype = np.dtype(dtype)
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+            self._buffers[name] = np.zeros((chunk_size,) + tuple(shape), dtype=dtype)
+            self._index["streams"][name] = {"dtype": dtype.str, "shape": list(shape), "chunks": []}
+            if name in self.codecs:
+                self._index["streams"][name]["codec"] = self.codecs[name].config()
+
+    @classmethod
+    def from_sensor_specs(cls, path, sensor_specs, action_names=None, **kwargs):
+        stream_specs = {sensor_spec.uuid: observation_spec(sensor_spec) for sensor_spec in sensor_specs}
+        stream_specs["action"] = ((), np.int16)
+        stream_specs["position"] = ((3,), np.float32)
+        stream_specs["rotation"] = ((4,), np.float32)
+        return cls(path, stream_specs, action_names=action_names, **kwargs)
+
+    def record(self, observations, action=None, agent_state=None):
+        r"""Append one step.
+
+        ``action`` is the action that produced ``observations`` (a name, an
+        index or ``None`` for the first step of an episode).
+        """
+        for name, buffer in self._buffers.items():
+            if name in observations:
+                buffer[self._fill] = observations[name]
+        if "action" in self._buffers:
+            if isinstance(action, str):
+                action = self.action_names.index(action)
+            self._buffers["action"][self._fill] = -1 if action is None else action
+        if agent_state is not None and "position" in self._buffers:
+            rotation = agent_state.rotation
+            self._buffers["position"][self._fill] = agent_state.position
+            # wxyz, like quaternion.as_float_array
+            self._buffers["rotation"][self._fill] = [rotation.w, rotation.x, rotation.y, rotation.z]
+        self._fill += 1
+        self.num_steps += 1
+        if self._fill == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._fill == 0:
+            return
+        start = self.num_steps - self._fill
+        chunk_id = start // self.chunk_size
+        for name, buffer in self._buffers.items():
+            entry = self._write_chunk(name, chunk_id, buffer[: self._fill])
+            entry.update(start=start, length=self._fill)
+            chunks = self._index["streams"][name]["chunks"]
+            # a partial chunk flushed early is replaced when it is flushed again
+            if chunks and chunks[-1]["start"] == start:
+                chunks.pop()
+            chunks.append(entry)
+        if self._fill == self.chunk_size:
+            self._fill = 0
+        self._index["num_steps"] = self.num_steps
+        write_atomic(os.path.join(self.path, INDEX_FILE), json.dumps(self._index).encode())
+
+    def _write_chunk(self, name, chunk_id, data):
+        codec = self.codecs.get(name)
+        if codec is not None:
+            codec.reset()
+            frames = [codec.encode(frame) for frame in data]
+            # frame count and end offsets, followed by the encoded frames
+            ends = np.cumsum([len(frame) for frame in frames], dtype=np.uint64)
+            payload = np.uint64(len(frames)).tobytes() + ends.tobytes() + b"".join(frames)
+            file_name = f"{chunk_id:06d}.frames"
+            write_atomic(os.path.join(self.path, name, file_name), payload)
+            return {"file": os.path.join(name, file_name), "codec": "frames"}
+
+        payload = io.BytesIO()
+        np.save(payload, data)
+        payload = payload.getvalue()
+        file_name = f"{chunk_id:06d}.npy"
+        if self.compression == "zlib":
+            payload = zlib.compress(payload, self.level)
+            file_name += ".zlib"
+        write_atomic(os.path.join(self.path, name, file_name), payload)
+        return {"file": os.path.join(name, file_name), "codec": self.compression or "npy"}
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RolloutReader:
+    r"""Random access to a rollout written by :class:`RolloutRecorder`.
+
+    Uncompressed chunks are memory-mapped; compressed and codec-encoded
+    chunks are decoded on first use and kept in a small LRU cache.
+    """
+
+    def __init__(self, path, cache_chunks=8):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.num_steps = self.index["num_steps"]
+        self.chunk_size = self.index["chunk_size"]
+        self.action_names = self.index["action_names"]
+        self.streams = list(self.index["streams"])
+        self._cache_chunks = cache_chunks
+        self._chunks = OrderedDict()
+        self._codecs = {
+            name: make_codec(stream["codec"]) for name, stream in self.index["streams"].items() if "codec" in stream
+        }
+
+    def __len__(self):
+        return self.num_steps
+
+    def spec(self, name):
+        stream = self.index["streams"][name]
+        return tuple(stream["shape"]), np.dtype(stream["dtype"])
+
+    def _load_chunk(self, name, chunk_id):
+        key = (name, chunk_id)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        entry = self.index["streams"][name]["chunks"][chunk_id]
+        chunk_path = os.path.join(self.path, entry["file"])
+        chunk = self._decode(name, entry, chunk_path)
+        self._chunks[key] = chunk
+        while len(self._chunks) > self._cache_chunks:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def _decode(self, name, entry, chunk_path):
+        if entry["codec"] == "npy":
+            return np.load(chunk_path, mmap_mode="r")
+        with open(chunk_path, "rb") as f:
+            payload = f.read()
+        if entry["codec"] == "zlib":
+            return np.load(io.BytesIO(zlib.decompress(payload)))
+
+        codec = self._codecs[name]
+        codec.reset()
+        num_frames = int(np.frombuffer(payload, dtype=np.uint64, count=1)[0])
+        ends = np.frombuffer(payload, dtype=np.uint64, count=num_frames, offset=8).astype(np.int64)
+        body = memoryview(payload)[8 * (num_frames + 1) :]
+        starts = np.concatenate([[0], ends[:-1]])
+        return np.stack([codec.decode(body[start:end]) for start, end in zip(starts, ends)])
+
+    def read(self, name, steps, out=None):
+        r"""Gather ``steps`` (an int, slice or index array) of stream ``name``."""
+        if isinstance(steps, slice):
+            steps = np.arange(self.num_steps)[steps]
+        scalar = np.ndim(steps) == 0
+        steps = np.atleast_1d(np.asarray(steps, dtype=np.int64))
+        if len(steps) and (steps.min() < 0 or steps.max() >= self.num_steps):
+            raise IndexError(f"Steps out of range for a rollout of {self.num_steps} steps")
+        shape, dtype = self.spec(name)
+        if out is None:
+            out = np.empty((len(steps),) + shape, dtype=dtype)
+        chunk_ids = steps // self.chunk_size
+        for chunk_id in np.unique(chunk_ids):
+            mask = chunk_ids == chunk_id
+            chunk = self._load_chunk(name, int(chunk_id))
+            out[mask] = chunk[steps[mask] - chunk_id * self.chunk_size]
+        return out[0] if scalar else out
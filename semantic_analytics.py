@@ -0,0 +1,75 @@
+import numpy as np
+
+from semantic_index import SemanticSceneIndex
+
+
+class SemanticLUT:
+    r"""Instance id -> category id lookup table for semantic sensor frames.
+
+    Semantic sensor pixels hold object instance ids. The table is built
+    once from the scene objects, after which whole batches of ``(B, H, W)``
+    frames become category maps, per-class pixel histograms and
+    visible-object masks in single vectorized passes. Instance ids without
+    an object, and pixels beyond the table, map to category ``-1``.
+    """
+
+    def __init__(self, instance_ids, category_ids, category_names=None):
+        instance_ids = np.asarray(instance_ids, dtype=np.int64)
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        size = int(instance_ids.max()) + 1 if len(instance_ids) else 0
+        # one trailing -1 entry that out-of-range ids are clamped to
+        self.table = np.full(size + 1, -1, dtype=np.int32)
+        valid = instance_ids >= 0
+        self.table[instance_ids[valid]] = category_ids[valid]
+        self.num_instances = size
+        self.num_classes = int(category_ids.max()) + 1 if len(category_ids) else 0
+        self.category_names = np.full(self.num_classes, "", dtype=object)
+        if category_names is not None:
+            known = category_ids >= 0
+            self.category_names[category_ids[known]] = np.asarray(category_names, dtype=object)[known]
+
+    @classmethod
+    def from_scene(cls, semantic_scene):
+        return cls.from_index(SemanticSceneIndex.from_scene(semantic_scene))
+
+    @classmethod
+    def from_index(cls, scene_index):
+        r"""Table from the columns of a :class:`semantic_index.SemanticSceneIndex`."""
+        return cls(scene_index.instance_ids, scene_index.category_ids, scene_index.category_names)
+
+    def _instances(self, frames):
+        frames = np.asarray(frames)
+        if frames.ndim == 2:
+            frames = frames[None]
+        return np.minimum(frames, self.num_instances)
+
+    def category_map(self, frames):
+        r"""``(B, H, W)`` category ids of a batch of semantic frames."""
+        return self.table[self._instances(frames)]
+
+    def class_histograms(self, frames, num_classes=None):
+        r"""``(B, num_classes)`` pixel counts per category of every frame.
+
+        Pixels without a category are not counted.
+        """
+        categories = self.category_map(frames)
+        num_classes = self.num_classes if num_classes is None else num_classes
+        batch = len(categories)
+        # shift by one so that -1 lands in a dropped bin, and offset every frame by its own block of bins
+        bins = np.minimum(categories.reshape(batch, -1).astype(np.int64) + 1, num_classes + 1)
+        bins += np.arange(batch)[:, None] * (num_classes + 2)
+        counts = np.bincount(bins.reshape(-1), minlength=batch * (num_classes + 2))
+        return counts.reshape(batch, num_classes + 2)[:, 1 : num_classes + 1]
+
+    def instance_histograms(self, frames):
+        r"""``(B, num_instances)`` pixel counts per instance id of every frame."""
+        instances = self._instances(frames)
+        batch = len(instances)
+        bins = instances.reshape(batch, -1).astype(np.int64) + np.arange(batch)[:, None] * (self.num_instances + 1)
+        counts = np.bincount(bins.reshape(-1), minlength=batch * (self.num_instances + 1))
+        return counts.reshape(batch, self.num_instances + 1)[:, : self.num_instances]
+
+    def visible_objects(self, frames, min_pixels=1):
+        r"""``(B, num_instances)`` mask of the instances covering at least
+        ``min_pixels`` pixels of each frame; ``np.nonzero`` gives the ids."""
+        return self.instance_histograms(frames) >= min_pixels
@@ -0,0 +1,191 @@
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from utils import get_output_path, save_npz_atomic, scene_file_key
+
+_LEVEL_COLUMNS = ("level_ids", "level_centers", "level_sizes")
+_REGION_COLUMNS = (
+    "region_ids",
+    "region_category_ids",
+    "region_category_names",
+    "region_centers",
+    "region_sizes",
+    "region_levels",
+)
+_OBJECT_COLUMNS = (
+    "object_ids",
+    "instance_ids",
+    "category_ids",
+    "category_names",
+    "centers",
+    "sizes",
+    "object_regions",
+    "object_levels",
+)
+
+
+def _category(node):
+    category = node.category
+    if category is None:
+        return -1, ""
+    return int(category.index()), category.name()
+
+
+def _instance_id(object_id, fallback):
+    # semantic sensor values are the numeric suffix of the object id, e.g. "1_4_87" -> 87
+    try:
+        return int(object_id.split("_")[-1])
+    except ValueError:
+        return fallback
+
+
+class SemanticSceneIndex:
+    r"""Columnar NumPy tables of a semantic scene, with spatial queries.
+
+    ``sim.semantic_scene`` is walked once, ``levels -> regions -> objects``
+    as in ``print_scene_recur``, and flattened into per-table columns:
+
+    * levels: ``level_ids``, ``level_centers``, ``level_sizes``,
+    * regions: ``region_ids``, ``region_category_ids``,
+      ``region_category_names``, ``region_centers``, ``region_sizes`` and
+      the parent row ``region_levels``,
+    * objects: ``object_ids``, ``instance_ids`` (the values reported by the
+      semantic sensor), ``category_ids``, ``category_names``, ``centers``,
+      ``sizes`` and the parent rows ``object_regions`` and ``object_levels``.
+
+    Parent rows are ``-1`` for nodes outside the hierarchy. Object centers
+    are indexed by a KD-tree for nearest and box queries, and objects are
+    sorted by category for category lookups.
+    """
+
+    def __init__(self, tables):
+        for name in _LEVEL_COLUMNS + _REGION_COLUMNS + _OBJECT_COLUMNS:
+            setattr(self, name, tables[name])
+        self._tree = cKDTree(self.centers) if len(self.centers) else None
+        self._category_order = np.argsort(self.category_ids, kind="stable")
+        self._sorted_categories = self.category_ids[self._category_order]
+        self._category_trees = {}
+
+    def __len__(self):
+        return len(self.object_ids)
+
+    @classmethod
+    def from_scene(cls, semantic_scene, scene_path=None, cache_dir=None):
+        r"""Index of ``semantic_scene``, cached under ``output/semantic_index``
+        when ``scene_path`` is given."""
+        cache_path = None
+        if scene_path is not None and os.path.exists(scene_path):
+            if cache_dir is None:
+                cache_dir = os.path.join(get_output_path(), "semantic_index")
+            os.makedirs(cache_dir, exist_ok=True)
+            cache_path = os.path.join(cache_dir, scene_file_key(scene_path) + ".npz")
+            if os.path.exists(cache_path):
+                with np.load(cache_path) as cached:
+                    return cls({name: cached[name] for name in cached.files})
+
+        index = cls(cls._extract(semantic_scene))
+        if cache_path is not None:
+            index.save(cache_path)
+        return index
+
+    @staticmethod
+    def _extract(semantic_scene):
+        levels, regions, objects = [], [], []
+        level_rows, region_rows, object_rows = {}, {}, {}
+        for level in semantic_scene.levels:
+            level_rows[level.id] = len(levels)
+            levels.append((level.id, level.aabb.center, level.aabb.size))
+            for region in level.regions:
+                region_rows[region.id] = len(regions)
+                regions.append((region.id, *_category(region), region.aabb.center, region.aabb.size, level_rows[level.id]))
+                for obj in region.objects:
+                    object_rows[obj.id] = len(objects)
+                    objects.append((obj, region_rows[region.id], level_rows[level.id]))
+        # objects and regions that are not reachable from a level
+        for region in semantic_scene.regions:
+            if region is not None and region.id not in region_rows:
+                region_rows[region.id] = len(regions)
+                regions.append((region.id, *_category(region), region.aabb.center, region.aabb.size, -1))
+        for obj in semantic_scene.objects:
+            if obj is not None and obj.id not in object_rows:
+                object_rows[obj.id] = len(objects)
+                objects.append((obj, -1, -1))
+
+        tables = {
+            "level_ids": np.array([row[0] for row in levels], dtype=str),
+            "level_centers": np.array([row[1] for row in levels], dtype=np.float32).reshape(-1, 3),
+            "level_sizes": np.array([row[2] for row in levels], dtype=np.float32).reshape(-1, 3),
+            "region_ids": np.array([row[0] for row in regions], dtype=str),
+            "region_category_ids": np.array([row[1] for row in regions], dtype=np.int32),
+            "region_category_names": np.array([row[2] for row in regions], dtype=str),
+            "region_centers": np.array([row[3] for row in regions], dtype=np.float32).reshape(-1, 3),
+            "region_sizes": np.array([row[4] for row in regions], dtype=np.float32).reshape(-1, 3),
+            "region_levels": np.array([row[5] for row in regions], dtype=np.int32),
+        }
+        categories = [_category(obj) for obj, _, _ in objects]
+        tables.update(
+            object_ids=np.array([obj.id for obj, _, _ in objects], dtype=str),
+            instance_ids=np.array([_instance_id(obj.id, row) for row, (obj, _, _) in enumerate(objects)], dtype=np.int64),
+            category_ids=np.array([category_id for category_id, _ in categories], dtype=np.int32),
+            category_names=np.array([name for _, name in categories], dtype=str),
+            centers=np.array([obj.aabb.center for obj, _, _ in objects], dtype=np.float32).reshape(-1, 3),
+            sizes=np.array([obj.aabb.size for obj, _, _ in objects], dtype=np.float32).reshape(-1, 3),
+            object_regions=np.array([row[1] for row in objects], dtype=np.int32),
+            object_levels=np.array([row[2] for row in objects], dtype=np.int32),
+        )
+        return tables
+
+    def save(self, path):
+        save_npz_atomic(path, **{name: getattr(self, name) for name in _LEVEL_COLUMNS + _REGION_COLUMNS + _OBJECT_COLUMNS})
+
+    def category_id(self, category):
+        r"""Category id of a category name, ids pass through unchanged."""
+        if not isinstance(category, str):
+            return int(category)
+        matches = np.flatnonzero(self.category_names == category)
+        return int(self.category_ids[matches[0]]) if len(matches) else -1
+
+    def of_category(self, category):
+        r"""Object rows of a category, given as a name or an id."""
+        category_id = self.category_id(category)
+        start, stop = np.searchsorted(self._sorted_categories, [category_id, category_id + 1])
+        return self._category_order[start:stop]
+
+    def nearest(self, points, k=1, category=None):
+        r"""Distances and object rows of the ``k`` objects closest to ``(N, 3)`` points.
+
+        Both results are ``(N, k)``; missing neighbours have distance ``inf``
+        and row ``len(self)``. With ``category`` only objects of that
+        category are searched.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if category is None:
+            tree, rows = self._tree, None
+        else:
+            category_id = self.category_id(category)
+            if category_id not in self._category_trees:
+                rows = self.of_category(category_id)
+                self._category_trees[category_id] = (cKDTree(self.centers[rows]) if len(rows) else None, rows)
+            tree, rows = self._category_trees[category_id]
+        if tree is None:
+            return np.full((len(points), k), np.inf), np.full((len(points), k), len(self), dtype=np.int64)
+        distances, neighbours = tree.query(points, k=k)
+        distances = distances.reshape(len(points), k)
+        neighbours = neighbours.reshape(len(points), k)
+        if rows is not None:
+            neighbours = np.append(rows, len(self))[neighbours]
+        return distances, np.where(np.isfinite(distances), neighbours, len(self))
+
+    def in_aabb(self, lower, upper):
+        r"""Rows of the objects whose centers lie inside the box ``[lower, upper]``."""
+        if self._tree is None:
+            return np.empty(0, dtype=np.int64)
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        # ball in the max-norm around the box center, trimmed to the box
+        rows = np.asarray(self._tree.query_ball_point((lower + upper) / 2, np.max(upper - lower) / 2, p=np.inf), dtype=np.int64)
+        centers = self.centers[rows]
+        inside = np.all((centers >= lower) & (centers <= upper), axis=1)
+        return np.sort(rows[inside])
@@ -0,0 +1,64 @@
+import habitat_sim
+import magnum as mn
+import numpy as np
+
+# uuid -> (sensor type, observation channels, observation dtype)
+SENSOR_TYPES = {
+    "color_sensor": (habitat_sim.SensorType.COLOR, 4, np.uint8),
+    "depth_sensor": (habitat_sim.SensorType.DEPTH, 1, np.float32),
+    "semantic_sensor": (habitat_sim.SensorType.SEMANTIC, 1, np.uint32),
+}
+
+
+def build_sensor_specs(settings):
+    r"""Camera specs for the sensors enabled in ``settings``.
+
+    Only sensors whose boolean flag (``settings["color_sensor"]`` etc.) is
+    set are created, so disabled sensors cost no render pass. Each sensor
+    uses ``settings["height"]``/``settings["width"]`` unless overridden with
+    ``settings["<uuid>_resolution"] = [height, width]``, and its field of
+    view can be set with ``settings["<uuid>_hfov"]``.
+    """
+    sensor_specs = []
+    for uuid, (sensor_type, _, _) in SENSOR_TYPES.items():
+        if not settings.get(uuid, False):
+            continue
+        sensor_spec = habitat_sim.CameraSensorSpec()
+        sensor_spec.uuid = uuid
+        sensor_spec.sensor_type = sensor_type
+        sensor_spec.resolution = list(settings.get(f"{uuid}_resolution", [settings["height"], settings["width"]]))
+        sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
+        sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
+        if f"{uuid}_hfov" in settings:
+            sensor_spec.hfov = mn.Deg(settings[f"{uuid}_hfov"])
+        sensor_specs.append(sensor_spec)
+    return sensor_specs
+
+
+def observation_spec(sensor_spec):
+    r"""``(shape, dtype)`` of the observations produced by a sensor spec."""
+    channels, dtype = next(
+        (channels, dtype)
+        for sensor_type, channels, dtype in SENSOR_TYPES.values()
+        if sensor_type == sensor_spec.sensor_type
+    )
+    height, width = (int(value) for value in sensor_spec.resolution)
+    shape = (height, width, channels) if channels > 1 else (height, width)
+    return shape, np.dtype(dtype)
+
+
+def estimate_render_cost(sensor_specs):
+    r"""Expected per-step cost of rendering and reading back ``sensor_specs``."""
+    sensors = {}
+    for sensor_spec in sensor_specs:
+        shape, dtype = observation_spec(sensor_spec)
+        sensors[sensor_spec.uuid] = {
+            "pixels": shape[0] * shape[1],
+            "bytes": int(np.prod(shape)) * dtype.itemsize,
+        }
+    return {
+        "render_passes": len(sensors),
+        "pixels": sum(sensor["pixels"] for sensor in sensors.values()),
+        "bytes": sum(sensor["bytes"] for sensor in sensors.values()),
+        "sensors": sensors,
+    }
@@ -0,0 +1,89 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from sensor_rig import observation_spec
+
+
+class SharedObservationBuffer:
+    r"""Preallocated shared-memory observation slots for a set of workers.
+
+    One shared-memory block is allocated per sensor, sized from the sensor
+    specs of ``make_cfg`` with one slot per worker, plus a block holding a
+    sequence number per worker. A worker copies its step's observations into
+    its slot in place and then bumps its sequence number; the consumer gets
+    NumPy views of the same memory, already stacked along the worker
+    dimension, so observations are never pickled or copied through pipes.
+
+    A sequence number is odd while its worker is writing and even once the
+    frame is complete, so :meth:`read` rejects torn or stale frames.
+
+    The process that creates the buffer owns it and unlinks the blocks on
+    :meth:`close`; other processes attach with ``names=buffer.names``.
+    """
+
+    def __init__(self, sensor_specs, num_slots, names=None):
+        self._owner = names is None
+        self.num_slots = num_slots
+        self._blocks = {}
+        self.arrays = {}
+        for sensor_spec in sensor_specs:
+            shape, dtype = observation_spec(sensor_spec)
+            shape = (num_slots,) + shape
+            uuid = sensor_spec.uuid
+            self._blocks[uuid] = self._open_block(int(np.prod(shape)) * dtype.itemsize, names, uuid)
+            self.arrays[uuid] = np.ndarray(shape, dtype=dtype, buffer=self._blocks[uuid].buf)
+        self._seq_block = self._open_block(8 * num_slots, names, "__seq__")
+        self._seqs = np.ndarray((num_slots,), dtype=np.int64, buffer=self._seq_block.buf)
+        if self._owner:
+            self._seqs[:] = 0
+
+    def _open_block(self, nbytes, names, key):
+        if self._owner:
+            return shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        return shared_memory.SharedMemory(name=names[key])
+
+    @property
+    def names(self):
+        names = {uuid: block.name for uuid, block in self._blocks.items()}
+        names["__seq__"] = self._seq_block.name
+        return names
+
+    def seq(self, slot):
+        return int(self._seqs[slot])
+
+    def write(self, slot, observations):
+        r"""Copy one step's observations into ``slot`` (worker side)."""
+        self._seqs[slot] += 1
+        for uuid, array in self.arrays.items():
+            np.copyto(array[slot], observations[uuid])
+        self._seqs[slot] += 1
+        return int(self._seqs[slot])
+
+    def read(self, expected_seqs=None):
+        r"""Zero-copy ``(num_slots, ...)`` views of the latest frames.
+
+        The views stay valid until the workers are asked for their next
+        step. Raises ``RuntimeError`` if a slot is being written or does not
+        hold the frame the caller waited for.
+        """
+        seqs = self._seqs.copy()
+        torn = seqs % 2 == 1
+        if expected_seqs is not None:
+            torn |= seqs != np.asarray(expected_seqs)
+        if torn.any():
+            raise RuntimeError(f"Torn or stale observation frames in slots {np.flatnonzero(torn).tolist()}")
+        return self.arrays
+
+    def close(self):
+        self.arrays = {}
+        self._seqs = None
+        for block in list(self._blocks.values()) + [self._seq_block]:
+            try:
+                block.close()
+            except BufferError:
+                # the caller still holds views, the mapping goes away with them
+                pass
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
@@ -0,0 +1,139 @@
+import math
+
+import cv2
+import numpy as np
+from habitat.utils.visualizations import maps
+
+
+class TopDownOverlay:
+    r"""Incremental agent/path overlay on a static top-down map.
+
+    The navmesh does not change within a scene, so the map is colorized once.
+    Two canvases are kept: ``trail`` holds the base map plus everything that
+    persists for the episode (path, goal), and ``canvas`` additionally holds
+    the agent sprite. Each :meth:`update` only touches the rectangles around
+    the previous sprite, the new path segment and the new sprite, so the
+    per-step cost scales with the sprite size instead of the map area.
+    """
+
+    def __init__(self, topdown_map, agent_radius_px=10, path_color=(0, 200, 0), path_thickness=2, goal_color=(255, 0, 0)):
+        self.base = maps.colorize_topdown_map(topdown_map)
+        self.trail = self.base.copy()
+        self.canvas = self.base.copy()
+        self.agent_radius_px = agent_radius_px
+        self.path_color = path_color
+        self.path_thickness = path_thickness
+        self.goal_color = goal_color
+        # the rotated sprite is at most sqrt(2) times the unrotated one
+        self._sprite_half_size = int(math.ceil(agent_radius_px * math.sqrt(2))) + 1
+        self._agent_rect = None
+        self._last_grid = None
+
+    def reset(self):
+        r"""Clear path, goal and agent for a new episode in the same scene."""
+        np.copyto(self.trail, self.base)
+        np.copyto(self.canvas, self.base)
+        self._agent_rect = None
+        self._last_grid = None
+
+    def draw_goal(self, grid_pos, radius_px=None):
+        radius_px = self.agent_radius_px // 2 if radius_px is None else radius_px
+        center = (int(grid_pos[1]), int(grid_pos[0]))
+        cv2.circle(self.trail, center, radius_px, self.goal_color, -1)
+        self._refresh(self._rect(grid_pos, grid_pos, radius_px + 1))
+
+    def update(self, grid_pos, agent_rotation):
+        r"""Move the agent to ``grid_pos`` (row, col) and return the canvas."""
+        grid_pos = (int(grid_pos[0]), int(grid_pos[1]))
+        if self._agent_rect is not None:
+            self._refresh(self._agent_rect)
+
+        if self._last_grid is not None and self._last_grid != grid_pos:
+            cv2.line(self.trail, self._last_grid[::-1], grid_pos[::-1], self.path_color, self.path_thickness)
+            self._refresh(self._rect(self._last_grid, grid_pos, self.path_thickness))
+        self._last_grid = grid_pos
+
+        maps.draw_agent(self.canvas, grid_pos, agent_rotation, agent_radius_px=self.agent_radius_px)
+        self._agent_rect = self._rect(grid_pos, grid_pos, self._sprite_half_size)
+        return self.canvas
+
+    def _rect(self, start, end, margin):
+        rows, cols = self.canvas.shape[:2]
+        r0 = max(0, min(start[0], end[0]) - margin)
+        r1 = min(rows, max(start[0], end[0]) + margin + 1)
+        c0 = max(0, min(start[1], end[1]) - margin)
+        c1 = min(cols, max(start[1], end[1]) + margin + 1)
+        return r0, r1, c0, c1
+
+    def _refresh(self, rect):
+        r0, r1, c0, c1 = rect
+        self.canvas[r0:r1, c0:c1] = self.trail[r0:r1, c0:c1]
+
+
+class BirdseyeGoalView:
+    r"""Cached version of ``maps.pointnav_draw_target_birdseye_view``.
+
+    The target bands and the goal only change with the zoom level, which
+    is the agent-goal distance rounded up to a power of two, so one
+    background is drawn per zoom level and kept. :meth:`update` restores
+    the rectangle under the previous agent sprite, or the whole canvas when
+    the zoom level changed, and draws the agent. The output matches the
+    habitat function, including the final 180 degree rotation.
+    """
+
+    BAND_RADII = (20, 10, 5, 2.5, 1)
+    BAND_COLORS = ((47, 19, 122), (22, 99, 170), (92, 177, 0), (226, 169, 0), (226, 12, 29))
+
+    def __init__(self, goal_position, resolution_px=800, goal_radius=0.2, agent_radius_px=20):
+        self.goal_position = np.asarray(goal_position, dtype=np.float64)
+        self.resolution_px = resolution_px
+        self.goal_radius = goal_radius
+        self.agent_radius_px = agent_radius_px
+        self.canvas = np.empty((resolution_px, resolution_px, 3), dtype=np.uint8)
+        self._backgrounds = {}
+        self._padding = None
+        self._sprite_half_size = int(math.ceil(agent_radius_px * math.sqrt(2))) + 1
+        self._agent_rect = None
+
+    def _background(self, padding):
+        background = self._backgrounds.get(padding)
+        if background is None:
+            half_res = self.resolution_px // 2
+            background = np.full_like(self.canvas, 255)
+            for radius, color in zip(self.BAND_RADII, self.BAND_COLORS):
+                if padding * 4 > radius:
+                    cv2.circle(background, (half_res, half_res), max(2, int(half_res * radius / padding)), color, -1)
+            cv2.circle(background, (half_res, half_res), max(2, int(half_res * self.goal_radius / padding)), (127, 0, 0), -1)
+            self._backgrounds[padding] = background
+        return background
+
+    def update(self, agent_position, agent_heading):
+        r"""Return the view for the agent at ``agent_position`` (x, y, z).
+
+        The returned array is a rotated view of a canvas reused by the next
+        call; copy it to keep it.
+        """
+        relative = np.asarray(agent_position, dtype=np.float64) - self.goal_position
+        distance = float(np.linalg.norm(relative))
+        padding = max(2.0, 2.0 ** math.ceil(math.log2(max(1e-6, distance))))
+        background = self._background(padding)
+        if padding != self._padding:
+            np.copyto(self.canvas, background)
+            self._padding = padding
+        elif self._agent_rect is not None:
+            r0, r1, c0, c1 = self._agent_rect
+            self.canvas[r0:r1, c0:c1] = background[r0:r1, c0:c1]
+
+        half_res = self.resolution_px // 2
+        # (z, x) -> (row, col) around the goal
+        center = np.round(relative[[2, 0]] * half_res / padding + half_res).astype(np.int32)
+        maps.draw_agent(self.canvas, center, agent_heading, self.agent_radius_px)
+        margin = self._sprite_half_size
+        row, col = int(center[0]), int(center[1])
+        self._agent_rect = (
+            max(0, row - margin),
+            max(0, min(self.resolution_px, row + margin + 1)),
+            max(0, col - margin),
+            max(0, min(self.resolution_px, col + margin + 1)),
+        )
+        return np.rot90(self.canvas, 2)
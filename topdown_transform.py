@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class TopDownTransform:
+    r"""Vectorized world <-> top-down grid conversion for a navmesh.
+
+    The pathfinder bounds and the cell size are computed once, so whole
+    ``(N, 3)`` point arrays are converted in a single NumPy expression.
+
+    Two grid conventions are supported, matching the two methods used in
+    ``nav_mesh.py``:
+
+    * ``"sim"``: Habitat-Sim ``pathfinder.get_topdown_view``. Grid points are
+      float ``(x, y)`` pixels, x follows world x and y follows world z.
+    * ``"lab"``: Habitat-Lab ``maps.to_grid``/``maps.from_grid``. Grid points
+      are integer ``(row, col)`` indices, row follows world z and col follows
+      world x. The cell size is derived from the map shape exactly like
+      ``maps.to_grid`` does.
+    """
+
+    def __init__(self, lower_bound, upper_bound, meters_per_pixel=None, grid_shape=None, convention="sim"):
+        if convention not in ("sim", "lab"):
+            raise ValueError(f"Unknown grid convention: {convention}")
+        self.lower_bound = np.asarray(lower_bound, dtype=np.float64)
+        self.upper_bound = np.asarray(upper_bound, dtype=np.float64)
+        self.convention = convention
+        extent = np.abs(self.upper_bound - self.lower_bound)
+
+        if grid_shape is None:
+            if meters_per_pixel is None:
+                raise ValueError("grid_shape or meters_per_pixel is required")
+            # get_topdown_view (which maps.get_topdown_map wraps) truncates the extent to whole pixels
+            grid_shape = (int(extent[2] / meters_per_pixel), int(extent[0] / meters_per_pixel))
+        if convention == "sim":
+            if meters_per_pixel is None:
+                raise ValueError("The 'sim' convention requires meters_per_pixel")
+            # get_topdown_view samples the navmesh every meters_per_pixel from the lower bound
+            cell_size = (meters_per_pixel, meters_per_pixel)
+        else:
+            cell_size = (extent[0] / grid_shape[1], extent[2] / grid_shape[0])
+
+        self.grid_shape = (int(grid_shape[0]), int(grid_shape[1]))
+        # origin and cell size along (world x, world z)
+        self._origin = self.lower_bound[[0, 2]]
+        self._cell_size = np.asarray(cell_size, dtype=np.float64)
+
+    @classmethod
+    def from_pathfinder(cls, pathfinder, meters_per_pixel=None, grid_shape=None, convention="sim"):
+        lower_bound, upper_bound = pathfinder.get_bounds()
+        return cls(lower_bound, upper_bound, meters_per_pixel, grid_shape, convention)
+
+    @property
+    def meters_per_pixel(self):
+        return float(self._cell_size.mean())
+
+    def world_to_grid(self, points):
+        r"""Convert ``(N, 3)`` world points to ``(N, 2)`` grid points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        xz = (points[:, [0, 2]] - self._origin) / self._cell_size
+        if self.convention == "sim":
+            return xz
+        # int() in maps.to_grid truncates towards zero, and so does astype
+        return xz[:, ::-1].astype(np.int64)
+
+    def grid_to_world(self, grid_points, height=None):
+        r"""Convert ``(N, 2)`` grid points back to ``(N, 3)`` world points.
+
+        The y coordinate is taken from ``height`` (a scalar or an ``(N,)``
+        array) and defaults to the lower navmesh bound.
+        """
+        grid_points = np.asarray(grid_points, dtype=np.float64).reshape(-1, 2)
+        if self.convention == "lab":
+            grid_points = grid_points[:, ::-1]
+        xz = self._origin + grid_points * self._cell_size
+        points = np.empty((len(xz), 3), dtype=np.float64)
+        points[:, 0] = xz[:, 0]
+        points[:, 1] = self.lower_bound[1] if height is None else height
+        points[:, 2] = xz[:, 1]
+        return points
+
+    def in_bounds(self, grid_points):
+        r"""Boolean mask of the grid points that fall inside ``grid_shape``."""
+        grid_points = np.asarray(grid_points).reshape(-1, 2)
+        if self.convention == "sim":
+            rows, cols = grid_points[:, 1], grid_points[:, 0]
+        else:
+            rows, cols = grid_points[:, 0], grid_points[:, 1]
+        return (rows >= 0) & (rows < self.grid_shape[0]) & (cols >= 0) & (cols < self.grid_shape[1])
+
+    def world_to_grid_batch(self, trajectories):
+        r"""Convert a ragged list of ``(N_i, 3)`` trajectories in one call."""
+        return self._ragged(self.world_to_grid, trajectories, 3)
+
+    def grid_to_world_batch(self, trajectories, height=None):
+        r"""Inverse of :meth:`world_to_grid_batch`."""
+        return self._ragged(lambda points: self.grid_to_world(points, height), trajectories, 2)
+
+    @staticmethod
+    def _ragged(convert, trajectories, dim):
+        trajectories = [np.asarray(trajectory).reshape(-1, dim) for trajectory in trajectories]
+        if not trajectories:
+            return []
+        lengths = [len(trajectory) for trajectory in trajectories]
+        converted = convert(np.concatenate(trajectories, axis=0))
+        return np.split(converted, np.cumsum(lengths)[:-1])
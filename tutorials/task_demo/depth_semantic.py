@@ -1,22 +1,23 @@
-import math
 import os
 import random
+import sys
 
 import git
 import habitat_sim
-import imageio
-import magnum as mn
 import numpy as np
-from habitat_sim.utils import common as utils
-from habitat_sim.utils import viz_utils as vut
-from matplotlib import pyplot as plt
-from PIL import Image
 
 # Find data/ folder
 repo = git.Repo(".", search_parent_directories=True)
 dir_path = repo.working_tree_dir
 data_path = os.path.join(dir_path, "data")
 print(f"data_path = {data_path}")
+# Shared helpers live at the repository root
+sys.path.insert(0, dir_path)
+from live_viewer import LiveViewer
+from region_raster import RegionRaster
+from semantic_analytics import SemanticLUT
+from semantic_index import SemanticSceneIndex
+from sensor_rig import build_sensor_specs, estimate_render_cost
 
 # Create a video/ folder
 output_directory = os.path.join(dir_path, "video/")
@@ -26,36 +27,6 @@ if not os.path.exists(output_path):
 print(f"output_path = {output_path}")
 
 
-# Plotting utility
-def display_sample(rgb_obs, semantic_obs=np.array([]), depth_obs=np.array([])):
-    from habitat_sim.utils.common import d3_40_colors_rgb
-
-    rgb_img = Image.fromarray(rgb_obs, mode="RGBA")
-
-    arr = [rgb_img]
-    titles = ["rgb"]
-    if semantic_obs.size != 0:
-        semantic_img = Image.new("P", (semantic_obs.shape[1], semantic_obs.shape[0]))
-        semantic_img.putpalette(d3_40_colors_rgb.flatten())
-        semantic_img.putdata((semantic_obs.flatten() % 40).astype(np.uint8))
-        semantic_img = semantic_img.convert("RGBA")
-        arr.append(semantic_img)
-        titles.append("semantic")
-
-    if depth_obs.size != 0:
-        depth_img = Image.fromarray((depth_obs / 10 * 255).astype(np.uint8), mode="L")
-        arr.append(depth_img)
-        titles.append("depth")
-
-    plt.figure(figsize=(12, 8))
-    for i, data in enumerate(arr):
-        ax = plt.subplot(1, 3, i + 1)
-        ax.axis("off")
-        ax.set_title(titles[i])
-        plt.imshow(data)
-    plt.show()
-
-
 test_scene = os.path.join(
     data_path, "scene_datasets/mp3d_example/17DRP5sb8fy/17DRP5sb8fy.glb"
 )
@@ -90,32 +61,8 @@ def make_cfg(settings):
     sim_cfg.scene_dataset_config_file = settings["scene_dataset"]
     sim_cfg.enable_physics = settings["enable_physics"]
 
-    # Note: all sensors must have the same resolution
-    sensor_specs = []
-
-    color_sensor_spec = habitat_sim.CameraSensorSpec()
-    color_sensor_spec.uuid = "color_sensor"
-    color_sensor_spec.sensor_type = habitat_sim.SensorType.COLOR
-    color_sensor_spec.resolution = [settings["height"], settings["width"]]
-    color_sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
-    color_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(color_sensor_spec)
-
-    depth_sensor_spec = habitat_sim.CameraSensorSpec()
-    depth_sensor_spec.uuid = "depth_sensor"
-    depth_sensor_spec.sensor_type = habitat_sim.SensorType.DEPTH
-    depth_sensor_spec.resolution = [settings["height"], settings["width"]]
-    depth_sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
-    depth_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(depth_sensor_spec)
-
-    semantic_sensor_spec = habitat_sim.CameraSensorSpec()
-    semantic_sensor_spec.uuid = "semantic_sensor"
-    semantic_sensor_spec.sensor_type = habitat_sim.SensorType.SEMANTIC
-    semantic_sensor_spec.resolution = [settings["height"], settings["width"]]
-    semantic_sensor_spec.position = [0.0, settings["sensor_height"], 0.0]
-    semantic_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(semantic_sensor_spec)
+    # Only the enabled sensors are created, each one is a render pass per step
+    sensor_specs = build_sensor_specs(settings)
 
     # Here you can specify the amount of displacement in a forward action and the turn angle
     agent_cfg = habitat_sim.agent.AgentConfiguration()
@@ -136,6 +83,7 @@ def make_cfg(settings):
 
 
 cfg = make_cfg(sim_settings)
+print("per-step render cost:", estimate_render_cost(cfg.agents[sim_settings["default_agent"]].sensor_specifications))
 sim = habitat_sim.Simulator(cfg)
 
 
@@ -171,6 +119,17 @@ def print_scene_recur(scene, limit_output=10):
 scene = sim.semantic_scene
 # print_scene_recur(scene)
 
+# The same annotations as NumPy columns, extracted once per scene and cached
+scene_index = SemanticSceneIndex.from_scene(scene, scene_path=sim_settings["scene"])
+print(
+    f"Indexed {len(scene_index.level_ids)} levels, {len(scene_index.region_ids)} regions"
+    f" and {len(scene_index)} objects"
+)
+# Region of any point by a raster lookup instead of testing every region.aabb
+region_raster = RegionRaster.from_scene(scene_index, sim.pathfinder, scene_path=sim_settings["scene"])
+# Instance ids of the semantic sensor -> object categories
+semantic_lut = SemanticLUT.from_index(scene_index)
+
 # the randomness is needed when choosing the actions
 random.seed(sim_settings["seed"])
 sim.seed(sim_settings["seed"])
@@ -190,14 +149,25 @@ action_names = list(cfg.agents[sim_settings["default_agent"]].action_space.keys(
 
 max_frames = 5
 
+# One window for the whole loop, updated in place
+viewer = LiveViewer.from_settings(sim_settings)
+
 while total_frames < max_frames:
     action = random.choice(action_names)
     print("action", action)
     observations = sim.step(action)
-    rgb = observations["color_sensor"]
-    semantic = observations["semantic_sensor"]
-    depth = observations["depth_sensor"]
-
-    display_sample(rgb, semantic, depth)
+    _, region, _ = region_raster.lookup(agent.get_state().position)
+    if region[0] >= 0:
+        print("region", scene_index.region_category_names[region[0]])
+    if "semantic_sensor" in observations:
+        histogram = semantic_lut.class_histograms(observations["semantic_sensor"])[0]
+        print("visible categories", semantic_lut.category_names[np.flatnonzero(histogram)].tolist())
+    if "color_sensor" in observations:
+        viewer.update_observations(observations)
 
     total_frames += 1
+
+print("viewer", viewer.stats)
+# Keep the window open until it is closed by the user
+viewer.hold()
+viewer.close()
@@ -1,8 +1,8 @@
 import os
+import sys
 from typing import TYPE_CHECKING, Union, cast
 
 import git
-import matplotlib.pyplot as plt
 import numpy as np
 import habitat
 from habitat.config.default_structured_configs import (
@@ -11,14 +11,9 @@ from habitat.config.default_structured_configs import (
     TopDownMapMeasurementConfig,
 )
 from habitat.core.agent import Agent
-from habitat.tasks.nav.nav import NavigationEpisode, NavigationGoal
+from habitat.tasks.nav.nav import NavigationEpisode
 from habitat.tasks.nav.shortest_path_follower import ShortestPathFollower
-from habitat.utils.visualizations import maps
-from habitat.utils.visualizations.utils import (
-    images_to_video,
-    observations_to_image,
-    overlay_frame,
-)
+from habitat.utils.visualizations.utils import observations_to_image, overlay_frame
 from habitat_sim.utils import viz_utils as vut
 
 os.environ["MAGNUM_LOG"] = "quiet"
@@ -36,6 +31,9 @@ output_path = os.path.join(
 )
 os.makedirs(output_path, exist_ok=True)
 os.chdir(dir_path)
+# Shared helpers live at the repository root
+sys.path.insert(0, dir_path)
+from video_sink import StreamingVideoSink
 
 
 
@@ -110,6 +108,13 @@ def example_top_down_map_measure():
             observations = env.reset()
             agent.reset()
 
+            current_episode = env.current_episode
+            video_name = f"{os.path.basename(current_episode.scene_id)}_{current_episode.episode_id}"
+            # Frames are encoded in a background process as they are produced
+            video_sink = StreamingVideoSink(
+                os.path.join(output_path, f"{video_name}.mp4"), fps=6, quality=9
+            )
+
             # Get metrics
             info = env.get_metrics()
             # Concatenate RGB-D observation and topdowm map into one image
@@ -119,8 +124,7 @@ def example_top_down_map_measure():
             info.pop("top_down_map")
             # Overlay numeric metrics onto frame
             frame = overlay_frame(frame, info)
-            # Add fame to vis_frames
-            vis_frames = [frame]
+            video_sink.write(frame)
 
             # Repeat the steps above while agent doesn't reach the goal
             while not env.episode_over:
@@ -136,16 +140,13 @@ def example_top_down_map_measure():
 
                 info.pop("top_down_map")
                 frame = overlay_frame(frame, info)
-                vis_frames.append(frame)
+                video_sink.write(frame)
 
-            current_episode = env.current_episode
-            video_name = f"{os.path.basename(current_episode.scene_id)}_{current_episode.episode_id}"
-            # Create video from images and save to disk
-            images_to_video(
-                vis_frames, output_path, video_name, fps=6, quality=9
-            )
-            vis_frames.clear()
+            # Wait for the encoder to finish the video
+            video_sink.close()
             # Display video
             vut.display_video(f"{output_path}/{video_name}.mp4")
 
-example_top_down_map_measure()
+# The video encoder runs in a spawned process, which re-imports this module
+if __name__ == "__main__":
+    example_top_down_map_measure()
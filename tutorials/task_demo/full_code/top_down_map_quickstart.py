@@ -1,10 +1,18 @@
 import habitat
 import cv2
+import git
 import os
-from habitat.utils.visualizations import maps
+import sys
 import math
 import numpy as np
 
+# Shared helpers live at the repository root
+repo = git.Repo(".", search_parent_directories=True)
+sys.path.insert(0, repo.working_tree_dir)
+from map_cache import TopDownMapCache
+from topdown_overlay import BirdseyeGoalView, TopDownOverlay
+from topdown_transform import TopDownTransform
+
 FORWARD_KEY="w"
 LEFT_KEY="a"
 RIGHT_KEY="d"
@@ -58,6 +66,14 @@ def example():
     goal_position = compute_goal_position(agent_inil_pos, yaw, distance, theta)
     print(f"goal position:{goal_position}")
 
+    # The navmesh never changes within a scene: build and colorize the map once,
+    # then only redraw the agent, path and goal on top of it
+    topdown_map = TopDownMapCache().get(env.sim.pathfinder, agent_inil_pos[1], map_resolution=512, kind="lab")
+    grid_transform = TopDownTransform.from_pathfinder(env.sim.pathfinder, grid_shape=topdown_map.shape[:2], convention="lab")
+    overlay = TopDownOverlay(topdown_map, agent_radius_px=10)
+    overlay.draw_goal(grid_transform.world_to_grid(goal_position)[0])
+    # Same for the goal-centred view: the bands are cached, only the agent moves
+    birdseye = BirdseyeGoalView(goal_position)
 
     count_steps = 0
     while not env.episode_over:
@@ -84,10 +100,7 @@ def example():
         print("Destination, distance: {:3f}, theta(radians): {:.2f}".format(
             observations["pointgoal_with_gps_compass"][0],
             observations["pointgoal_with_gps_compass"][1]))
-        
-        topdown_map = maps.get_topdown_map_from_sim(env.sim, map_resolution=512)
-        topdown_map_color = maps.colorize_topdown_map(topdown_map)
-        
+
         agent_pos = env.sim.get_agent_state().position  # (x, y, z)
         agent_rot = env.sim.get_agent_state().rotation  # quat
         
@@ -97,20 +110,13 @@ def example():
         yaw = quat_to_yaw(q)
         print(f"yaw:{yaw}")
         # Convert real world x z to image axis
-        map_resolution = topdown_map.shape[0:2]
-        grid_x, grid_y = maps.to_grid(agent_pos[2], agent_pos[0], grid_resolution=map_resolution, sim=env.sim)
-        topdown_with_agent = maps.draw_agent(
-            topdown_map_color.copy(),
+        grid_x, grid_y = grid_transform.world_to_grid(agent_pos)[0]
+        topdown_with_agent = overlay.update(
             (grid_x, grid_y),  # Attention to the x,y order
             agent_rotation=yaw,
-            agent_radius_px=10,
         )
 
-        birdseye_view = maps.pointnav_draw_target_birdseye_view(
-            agent_position=agent_pos,
-            agent_heading=yaw,
-            goal_position=goal_position,
-        )
+        birdseye_view = birdseye.update(agent_pos, agent_heading=yaw)
 
         cv2.imshow("RGB", transform_rgb_bgr(observations["rgb"]))
         cv2.imshow("Top-Down Map with Agent", topdown_with_agent)
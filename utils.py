@@ -1,9 +1,12 @@
 import git
+import hashlib
 import os
+import tempfile
 import numpy as np
 from PIL import Image
 from matplotlib import pyplot as plt
 from habitat_sim.utils.common import d3_40_colors_rgb
+from topdown_transform import TopDownTransform
 
 
 os.environ["MAGNUM_LOG"] = "quiet"
@@ -24,6 +27,81 @@ def get_output_path():
         os.mkdir(output_path)
     return output_path
 
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scene_file_key(scene_path):
+    # path, size and mtime identify a scene file without hashing hundreds of megabytes
+    stat = os.stat(scene_path)
+    key = f"{os.path.abspath(scene_path)}_{stat.st_size}_{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:24]
+
+def write_atomic(path, data):
+    # write under a private name and rename, so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def save_array_atomic(path, array):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+def save_npz_atomic(path, **arrays):
+    # np.savez appends .npz to names without it, so the private name keeps the suffix
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def navmesh_hash(pathfinder):
+    # hash the serialized navmesh, so recomputed navmeshes get a new key
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        navmesh_path = os.path.join(tmp_dir, "scene.navmesh")
+        pathfinder.save_nav_mesh(navmesh_path)
+        return hash_file(navmesh_path)
+
+# id(pathfinder) -> (fingerprint, navmesh hash); no reference to the pathfinder is kept
+_navmesh_keys = {}
+
+def navmesh_fingerprint(pathfinder):
+    lower_bound, upper_bound = pathfinder.get_bounds()
+    return tuple(float(value) for value in (*lower_bound, *upper_bound, pathfinder.navigable_area))
+
+def cached_navmesh_hash(pathfinder):
+    # a recomputed navmesh, or a new one reusing the id, changes the cheap fingerprint
+    fingerprint = navmesh_fingerprint(pathfinder)
+    entry = _navmesh_keys.get(id(pathfinder))
+    if entry is None or entry[0] != fingerprint:
+        entry = (fingerprint, navmesh_hash(pathfinder))
+        _navmesh_keys[id(pathfinder)] = entry
+    return entry[1]
+
+def forget_navmesh_hash(pathfinder):
+    _navmesh_keys.pop(id(pathfinder), None)
+
+def get_floor_heights(pathfinder, bin_size=0.1, min_fraction=0.05, min_separation=1.0):
+    # floors are the heights that hold a large share of the navmesh vertices
+    heights = np.asarray(pathfinder.build_navmesh_vertices(), dtype=np.float64).reshape(-1, 3)[:, 1]
+    bins, counts = np.unique(np.round(heights / bin_size).astype(np.int64), return_counts=True)
+    dense = counts >= min_fraction * len(heights)
+    if not dense.any():
+        return [float(np.median(heights))]
+    floors = []
+    for value, count in zip(bins[dense] * bin_size, counts[dense]):
+        if floors and value - floors[-1][0] < min_separation:
+            # keep the most populated bin as the representative height
+            if count > floors[-1][2]:
+                floors[-1][1:] = [value, count]
+            continue
+        floors.append([value, value, count])
+    return [float(height) for _, height, _ in floors]
+
 def display_sample(rgb_obs, semantic_obs=np.array([]), depth_obs=np.array([]), figsize=(24, 8)):
     rgb_img = Image.fromarray(rgb_obs, mode="RGBA")
     arr = [rgb_img]
@@ -41,16 +119,18 @@ def display_sample(rgb_obs, semantic_obs=np.array([]), depth_obs=np.array([]), f
         arr.append(depth_img)
         titles.append("depth")
 
-    plt.figure(figsize=figsize)
+    fig = plt.figure(figsize=figsize)
     for i, data in enumerate(arr):
         ax = plt.subplot(1, len(arr), i + 1)
         ax.axis("off")
         ax.set_title(titles[i])
         plt.imshow(data)
     plt.show()
+    # release the figure, for streams of frames use live_viewer.LiveViewer
+    plt.close(fig)
 
 def display_map(topdown_map, key_points=None):
-    plt.figure(figsize=(12, 8))
+    fig = plt.figure(figsize=(12, 8))
     ax = plt.subplot(1, 1, 1)
     ax.axis("off")
     plt.imshow(topdown_map)
@@ -59,13 +139,9 @@ def display_map(topdown_map, key_points=None):
         for point in key_points:
             plt.plot(point[0], point[1], marker="o", markersize=10, alpha=0.8)
     plt.show()
+    plt.close(fig)
 
 def convert_points_to_topdown(pathfinder, points, meters_per_pixel):
-    points_topdown = []
-    bounds = pathfinder.get_bounds()
-    for point in points:
-        # convert 3D x,z to topdown x,y
-        px = (point[0] - bounds[0][0]) / meters_per_pixel
-        py = (point[2] - bounds[0][2]) / meters_per_pixel
-        points_topdown.append(np.array([px, py]))
-    return points_topdown
+    # convert 3D x,z to topdown x,y
+    transform = TopDownTransform.from_pathfinder(pathfinder, meters_per_pixel)
+    return transform.world_to_grid(points)
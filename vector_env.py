@@ -0,0 +1,142 @@
+import multiprocessing
+
+import numpy as np
+
+from shared_obs import SharedObservationBuffer
+
+
+def _worker(conn, settings, worker_id, num_envs, buffer_names):
+    import habitat_sim
+
+    from depth_semantic_sensors import make_cfg
+
+    cfg = make_cfg(settings)
+    sim = habitat_sim.Simulator(cfg)
+    # every worker explores with its own, reproducible seed
+    sim.seed(settings["seed"] + worker_id)
+    sim.initialize_agent(settings["default_agent"])
+    buffer = None
+    if buffer_names is not None:
+        sensor_specs = cfg.agents[settings["default_agent"]].sensor_specifications
+        buffer = SharedObservationBuffer(sensor_specs, num_envs, buffer_names)
+
+    def send(observations):
+        # with shared memory only the sequence number goes through the pipe
+        conn.send(observations if buffer is None else buffer.write(worker_id, observations))
+
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == "step":
+                send(sim.step(data))
+            elif command == "reset":
+                send(sim.reset())
+            elif command == "close":
+                break
+            else:
+                raise ValueError(f"Unknown command: {command}")
+    finally:
+        if buffer is not None:
+            buffer.close()
+        sim.close()
+        conn.close()
+
+
+class VectorSimEnv:
+    r"""N ``habitat_sim.Simulator`` worker processes stepped as one batch.
+
+    Every worker builds its simulator from the same ``make_cfg`` settings,
+    seeded with ``settings["seed"] + worker_id``. Actions are a sequence of
+    action names (or indices into :attr:`action_names`), one per worker, and
+    observations come back stacked per sensor uuid with a leading batch
+    dimension. :meth:`step_async` only dispatches the actions, so the caller
+    can overlap its own work with rendering before calling :meth:`step_wait`.
+
+    With ``shared_memory=True`` workers write observations into a
+    :class:`SharedObservationBuffer` and the returned arrays are zero-copy
+    views of it, valid until the next :meth:`step_async` or :meth:`reset`.
+
+    Workers are started with the ``spawn`` method, which re-imports the
+    calling script in each of them, so scripts that create the env must
+    guard their entry point with ``if __name__ == "__main__":``.
+    """
+
+    def __init__(self, settings, num_envs, shared_memory=False):
+        from depth_semantic_sensors import make_cfg
+
+        cfg = make_cfg(settings)
+        self.action_names = list(cfg.agents[settings["default_agent"]].action_space.keys())
+        self.num_envs = num_envs
+        self._waiting = False
+        self._closed = False
+        self._buffer = None
+        if shared_memory:
+            sensor_specs = cfg.agents[settings["default_agent"]].sensor_specifications
+            self._buffer = SharedObservationBuffer(sensor_specs, num_envs)
+        buffer_names = None if self._buffer is None else self._buffer.names
+
+        # spawn, so workers never inherit a GL context from the parent process
+        context = multiprocessing.get_context("spawn")
+        self._conns = []
+        self._processes = []
+        for worker_id in range(num_envs):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker, args=(child_conn, settings, worker_id, num_envs, buffer_names), daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+    def reset(self):
+        for conn in self._conns:
+            conn.send(("reset", None))
+        return self._collect()
+
+    def step_async(self, actions):
+        if self._waiting:
+            raise RuntimeError("step_async called twice without step_wait")
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}")
+        for conn, action in zip(self._conns, actions):
+            if not isinstance(action, str):
+                action = self.action_names[action]
+            conn.send(("step", action))
+        self._waiting = True
+
+    def step_wait(self):
+        if not self._waiting:
+            raise RuntimeError("step_wait called without step_async")
+        observations = self._collect()
+        self._waiting = False
+        return observations
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def _collect(self):
+        results = [conn.recv() for conn in self._conns]
+        if self._buffer is not None:
+            return self._buffer.read(results)
+        return {uuid: np.stack([obs[uuid] for obs in results]) for uuid in results[0]}
+
+    def close(self):
+        if self._closed:
+            return
+        if self._waiting:
+            for conn in self._conns:
+                conn.recv()
+        for conn in self._conns:
+            conn.send(("close", None))
+            conn.close()
+        for process in self._processes:
+            process.join()
+        if self._buffer is not None:
+            self._buffer.close()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,119 @@
+import multiprocessing
+import queue
+
+import imageio
+import numpy as np
+
+
+def _encode(path, frames, fps, quality, writer_kwargs):
+    writer = imageio.get_writer(path, fps=fps, quality=quality, **writer_kwargs)
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            writer.append_data(frame)
+    finally:
+        writer.close()
+
+
+def downscale_frame(frame, factor):
+    r"""Shrink an ``(H, W, C)`` frame by an integer ``factor`` with a box filter."""
+    if factor == 1:
+        return frame
+    height, width = frame.shape[0] // factor * factor, frame.shape[1] // factor * factor
+    blocks = frame[:height, :width].reshape(height // factor, factor, width // factor, factor, -1)
+    return blocks.mean(axis=(1, 3)).astype(frame.dtype)
+
+
+class StreamingVideoSink:
+    r"""Encodes frames to a video file while they are being produced.
+
+    Frames are sent through a bounded queue to a background process that
+    owns the ``imageio`` writer, so encoding overlaps with the rollout and
+    memory use does not grow with the episode length. When the queue is
+    full :meth:`write` blocks (backpressure), or with
+    ``drop_when_full=True`` drops the frame and counts it in
+    :attr:`dropped`. ``every_k`` keeps only every k-th frame and
+    ``downscale`` shrinks frames by an integer factor before they are
+    queued; ``fps`` should be adjusted accordingly by the caller.
+
+    Implements the ``write(frame)``/``close()`` sink interface of
+    :class:`frame_compositor.FrameCompositor`.
+    """
+
+    def __init__(
+        self,
+        path,
+        fps=30,
+        quality=9,
+        every_k=1,
+        downscale=1,
+        max_queue=32,
+        drop_when_full=False,
+        **writer_kwargs
+    ):
+        self.path = path
+        self.every_k = every_k
+        self.downscale = downscale
+        self.drop_when_full = drop_when_full
+        self.put_timeout = 0.5
+        self.written = 0
+        self.dropped = 0
+        self._count = 0
+        context = multiprocessing.get_context("spawn")
+        self._frames = context.Queue(maxsize=max_queue)
+        self._process = context.Process(
+            target=_encode, args=(path, self._frames, fps, quality, writer_kwargs), daemon=True
+        )
+        self._process.start()
+
+    def _put(self, item, block=True):
+        # wait in short slices, so a dead encoder raises instead of blocking forever
+        while True:
+            if not self._process.is_alive():
+                raise RuntimeError(f"Video encoder for {self.path} exited with code {self._process.exitcode}")
+            try:
+                self._frames.put(item, timeout=self.put_timeout if block else None, block=block)
+                return
+            except queue.Full:
+                if not block:
+                    raise
+
+    def write(self, frame):
+        r"""Queue a frame; returns ``False`` if it was skipped or dropped."""
+        if self._process is None:
+            raise RuntimeError(f"Video sink for {self.path} is closed")
+        self._count += 1
+        if (self._count - 1) % self.every_k:
+            return False
+        frame = downscale_frame(np.asarray(frame), self.downscale)
+        try:
+            self._put(frame, block=not self.drop_when_full)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.written += 1
+        return True
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            # the sentinel waits for a free slot, so every queued frame is encoded
+            self._put(None)
+        finally:
+            process, self._process = self._process, None
+            process.join()
+            if process.exitcode != 0:
+                # frames still buffered for a dead encoder must not block interpreter exit
+                self._frames.cancel_join_thread()
+            self._frames.close()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Video encoder for {self.path} exited with code {process.exitcode}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()